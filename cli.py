@@ -2,9 +2,10 @@ from win10toast import ToastNotifier
 import random, json, time
 
 from src.card import Card
+from src.config import DeckConfig, DEFAULT_LAYERS
 from src.pile import Pile
 from src.regex_in import regex_in
-from src.utils import merge, select_data
+from src.utils import search_data, select_data
 from src.player import Player
 
 
@@ -12,19 +13,24 @@ class Cards:
     __current_player: str = None
     __next_player: str = None
     __direction: int = 1
-    __pile: Pile = Pile()
+    __pile: Pile = None
 
-    def __init__(self) -> None:
+    def __init__(self, layers: tuple[str] = DEFAULT_LAYERS) -> None:
+        self.__pile = Pile()
+        self.layers: tuple[str] = layers
         self.cards: list[Card] = []
         self.played: list[Card] = []
         self.players: dict[str:Player] = {}
         self.deck: dict[str : list[str]] = {}
+        self.watchers: list[object] = []
 
         self.init_deck()
 
     def init_deck(self) -> None:
         try:
-            config = json.load(open("deck.json"))
+            config = DeckConfig.open("deck.json")
+            deck = config.deck(self.layers)
+            regex = config.regex
         except FileNotFoundError:
             print("deck.json not found")
             exit(1)
@@ -35,8 +41,7 @@ class Cards:
             print(e)
             exit(1)
 
-        self.regex = config["regex"]
-        deck = merge(config["template"], config["cards"], config["addons"])
+        self.regex = regex
         self.cards = []
         for color in deck["color"]:
             for value in deck["classic"]:
@@ -74,7 +79,7 @@ class Cards:
             time.sleep(5)
 
     def play_card(self) -> None:
-        select_data(self.players[self.current_player])
+        search_data(self.players[self.current_player])
 
     def play(self, player: str, card: Card) -> None:
         if player != self.current_player:
@@ -89,6 +94,8 @@ class Cards:
 
         self.played.append(card)
         self.players[player].remove(card)
+        for watcher in self.watchers:
+            watcher.played(player, card)
         if self.last_card.is_counter:
             self.pile.add(self.last_card)
         if self.last_card.is_no_counter:
@@ -123,9 +130,20 @@ class Cards:
             color = input("Choose a color: ")
         return color
 
-    def pick_card(self, player: str = None) -> None:
+    def timeout(self) -> None:
+        """Called by the turn clock when the current player runs out of time: auto-draw and pass"""
+        self.pick_card(forced=True)
+        self.change_player
+
+    def pick_card(self, player: str = None, forced: bool = False) -> None:
+        """
+        :param player: The player who draws, the current one by default
+        :param forced: True when the player did not choose to draw (turn timeout)
+        """
         if player is None:
             player = self.current_player
+        for watcher in self.watchers:
+            watcher.picked(player, self.cards[0], self, forced)
         self.players[player].append(self.cards.pop(0))
         ToastNotifier().show_toast("Cards", f"{player} pick a card: {self.players[player][-1]}", duration=1)
 
@@ -0,0 +1,191 @@
+from math import comb
+import random
+
+from src.rules import Rules
+
+
+def hypergeom(total: int, good: int, draws: int, k: int) -> float:
+    """
+    Probability of exactly k good cards when drawing without replacement
+
+    :param total: The number of cards
+    :param good: The number of good cards among them
+    :param draws: The number of drawn cards
+    :param k: The number of good cards wanted
+    """
+    if k < 0 or k > good or draws - k > total - good:
+        return 0.0
+    return comb(good, k) * comb(total - good, draws - k) / comb(total, draws)
+
+
+def at_least_one(total: int, good: int, draws: int) -> float:
+    return 1 - hypergeom(total, good, draws, 0)
+
+
+def splits(copies: int, hands: list[int]) -> list[tuple[tuple[int], int]]:
+    """
+    Every way to hold some of `copies` cards in hands of the given sizes
+
+    :return: The copies in each hand, with the number of ways to place them in the hands
+    """
+    if not hands:
+        return [((), 1)]
+    return [((c, *rest), comb(hands[0], c) * ways) for c in range(min(copies, hands[0]) + 1) for rest, ways in splits(copies - c, hands[1:])]
+
+
+class DeckOdds:
+    """
+    Exact odds of a composed deck, with the dealing rules of `Rules.deal`
+
+    One instance per deck content (sha1 of the composed deck), every answer is memoized.
+    """
+
+    instances: dict[str:"DeckOdds"] = {}
+
+    def __init__(self, rules: Rules) -> None:
+        self.rules: Rules = rules
+        self.memo: dict[tuple : object] = {}
+
+    @classmethod
+    def of(cls, rules: Rules) -> "DeckOdds":
+        digest = rules.digest
+        if digest not in cls.instances:
+            cls.instances[digest] = cls(rules)
+        return cls.instances[digest]
+
+    def __memo(self, key: tuple, compute: callable) -> object:
+        if key not in self.memo:
+            self.memo[key] = compute()
+        return self.memo[key]
+
+    @property
+    def size(self) -> int:
+        return sum(self.rules.count)
+
+    @property
+    def classic(self) -> list[int]:
+        """Card ids which can open the game"""
+        rules = self.rules
+        return [k for k in range(len(rules)) if not rules.special[k] and not rules.wild[k]]
+
+    def no_playable_opening(self, nb_card: int = 7) -> float:
+        """
+        Probability a dealt hand cannot play on the first card
+
+        The first card is drawn among the classic cards left after the deal, so given the
+        hand it is uniform over the `C - c` remaining classic cards, c being the number of
+        classic cards in the hand: P = sum over first cards t and over hands H without a
+        card playable on t of P(H) / (C - c(H)).
+        """
+        return self.__memo(("no_playable_opening", nb_card), lambda: self.__no_playable_opening(nb_card))
+
+    def __no_playable_opening(self, nb_card: int) -> float:
+        rules, total = self.rules, self.size
+        classic = set(self.classic)
+        n_classic = sum(rules.count[k] for k in classic)
+        hands = comb(total, nb_card)
+        p = 0.0
+        for top in classic:
+            legal = rules.legal(top, rules.color[top], False)
+            # cards unplayable on top, the top itself excluded
+            u_classic = sum(rules.count[k] for k in classic if not legal[k])
+            u_other = sum(rules.count[k] for k in range(len(rules)) if k not in classic and not legal[k])
+            for c in range(nb_card + 1):
+                p += rules.count[top] * comb(u_classic, c) * comb(u_other, nb_card - c) / hands / (n_classic - c)
+        return p
+
+    def playable_distribution(self, top: int, color: int, nb_card: int = 7) -> list[float]:
+        """
+        Distribution of the number of cards playable on `top` in a random hand
+
+        :return: The probability of 0, 1, ... nb_card playable cards
+        """
+        def compute() -> list[float]:
+            legal = self.rules.legal(top, color, False)
+            good = sum(c for k, c in enumerate(self.rules.count) if legal[k] and k != top) + (self.rules.count[top] - 1) * legal[top]
+            return [hypergeom(self.size - 1, good, nb_card, k) for k in range(nb_card + 1)]
+
+        return self.__memo(("playable_distribution", top, color, nb_card), compute)
+
+    def counter(self, kind: int, stacked: int = 1, nb_card: int = 7, unseen: int = None) -> float:
+        """
+        Probability the next player holds a card to counter a draw stack
+
+        :param kind: The card id which started the stack
+        :param stacked: How many cards of that value are already on the stack
+        :param nb_card: The hand size of the next player
+        :param unseen: The number of cards the hand is drawn from, the deck minus the stack by default
+        """
+        rules = self.rules
+        copies = sum(c for k, c in enumerate(rules.count) if rules.value[k] == rules.value[kind])
+        unseen = self.size - stacked if unseen is None else unseen
+        return at_least_one(unseen, max(0, copies - stacked), nb_card)
+
+    def expected_stack(self, kind: int, nb_card: int = 7, seats: int = 2) -> float:
+        """
+        Expected number of cards drawn at the end of a draw stack started by `kind`
+
+        Every player counters when their hand allows it, the stack grows by the card
+        draw amount each time, until the player to answer cannot. Both hands answer in
+        turn with what they still hold: the copies of the value left after the first one
+        are split between the hands (the starter keeps `nb_card - 1` cards, the others
+        hold `nb_card`) and the undealt cards, by a multivariate hypergeometric law, and
+        the stack length is summed over every split.
+        """
+        def compute() -> float:
+            rules = self.rules
+            copies = sum(c for k, c in enumerate(rules.count) if rules.value[k] == rules.value[kind]) - 1
+            unseen = self.size - 1
+            # the responders in playing order, the starter last
+            hands = [nb_card] * (seats - 1) + [nb_card - 1]
+            expected = 0.0
+            for split, weight in splits(copies, hands):
+                held, seat, stacked = list(split), 0, 1
+                while held[seat]:
+                    held[seat] -= 1
+                    stacked += 1
+                    seat = (seat + 1) % seats
+                expected += weight * comb(unseen - sum(hands), copies - sum(split)) * stacked * rules.draw[kind]
+            return expected / comb(unseen, copies)
+
+        return self.__memo(("expected_stack", kind, nb_card, seats), compute)
+
+    def stacks(self, nb_card: int = 7, seats: int = 2) -> dict[str:float]:
+        """Expected draw stack by draw card value"""
+        rules = self.rules
+        firsts = {}
+        for k in range(len(rules)):
+            if rules.draw[k]:
+                firsts.setdefault(rules.values[rules.value[k]], k)
+        return {value: self.expected_stack(k, nb_card, seats) for value, k in firsts.items()}
+
+    def mean_stack(self, nb_card: int = 7, seats: int = 2) -> float:
+        """Expected draw stack when a random draw card is played"""
+        rules = self.rules
+        draws = [k for k in range(len(rules)) if rules.draw[k]]
+        total = sum(rules.count[k] for k in draws)
+        return sum(rules.count[k] * self.expected_stack(k, nb_card, seats) for k in draws) / total if total else 0.0
+
+
+if __name__ == "__main__":
+    for layers in [("cards",), ("cards", "addons")]:
+        odds = DeckOdds.of(Rules.from_file(layers=layers))
+        print(layers, f"no playable opening: {odds.no_playable_opening():.4f}", {v: round(s, 3) for v, s in odds.stacks().items()}, f"mean stack {odds.mean_stack():.3f}")
+
+    # the stack odds against dealt hands answering in turn
+    rules, rng, n = Rules.from_file(layers=("cards",)), random.Random(0), 20_000
+    kind = rules.ids["red", "draw2"]
+    cards = rules.cards()
+    cards.remove(kind)
+    total = 0
+    for _ in range(n):
+        rng.shuffle(cards)
+        held = [sum(rules.value[k] == rules.value[kind] for k in hand) for hand in (cards[:7], cards[7:13])]
+        seat, stacked = 0, 1
+        while held[seat]:
+            held[seat] -= 1
+            stacked, seat = stacked + 1, 1 - seat
+        total += stacked * rules.draw[kind]
+    exact = DeckOdds.of(rules).expected_stack(kind)
+    assert abs(total / n - exact) < 0.03, f"{exact} against {total / n} simulated"
+    print(f"draw2 stack {exact:.3f}, simulated {total / n:.3f}")
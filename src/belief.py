@@ -0,0 +1,153 @@
+import numpy as np
+
+from src.rules import Rules
+
+Cards = any
+
+
+class Beliefs:
+    """
+    What an observer knows about the other hands
+
+    `unseen` counts, per card id, the cards the observer has not seen yet (in a hand or
+    in the draw pile). Every opponent has a weight vector over card ids: its hand is
+    modelled as `size` cards drawn from `unseen` in proportion to `unseen * weight`.
+    Each event updates those vectors in place, so the cost does not grow with the game.
+    """
+
+    def __init__(self, rules: Rules, players: list, observer: object, hand: list[int] = (), decay: float = 0.2) -> None:
+        """
+        :param rules: The compiled deck
+        :param players: The seats, names or ids
+        :param observer: The seat whose hand is known
+        :param hand: The card ids of the observer hand
+        :param decay: Weight kept by cards an opponent could have played but did not
+        """
+        self.rules: Rules = rules
+        self.observer: object = observer
+        self.decay: float = decay
+        self.unseen: np.ndarray = np.array(rules.count, dtype=np.float64)
+        self.weights: dict[object : np.ndarray] = {player: np.ones(len(rules)) for player in players if player != observer}
+        self.sizes: dict[object:int] = {player: 0 for player in players}
+        self.__legal: dict[tuple[int, int, bool] : np.ndarray] = {}
+        for kind in hand:
+            self.unseen[kind] -= 1
+        self.sizes[observer] = len(hand)
+
+    @classmethod
+    def attach(cls, cards: "Cards", observer: str, rules: Rules = None, **kwargs) -> "Beliefs":
+        """
+        Follow a `Cards` game: every `play` and `pick_card` is forwarded to the tracker
+
+        :param cards: The game, players already dealt
+        :param observer: The player whose hand is known
+
+        :return: The tracker
+        """
+        rules = rules or Rules(cards.deck, cards.regex)
+        beliefs = cls(rules, list(cards.players), observer, [rules.kind(card) for card in cards.players[observer]], **kwargs)
+        for player, hand in cards.players.items():
+            beliefs.sizes[player] = len(hand)
+        for card in cards.played:
+            beliefs.unseen[rules.kind(card)] -= 1
+        cards.watchers.append(beliefs)
+        return beliefs
+
+    def legal(self, top: int, color: int, pending: bool) -> np.ndarray:
+        if (top, color, pending) not in self.__legal:
+            self.__legal[top, color, pending] = np.array(self.rules.legal(top, color, pending))
+        return self.__legal[top, color, pending]
+
+    def play(self, player: object, kind: int) -> None:
+        self.sizes[player] -= 1
+        if player != self.observer:
+            self.unseen[kind] -= 1
+
+    def pick(self, player: object, n: int, top: int = None, color: int = None, pending: int = 0, kinds: list[int] = None) -> None:
+        """
+        A player drew instead of playing
+
+        :param player: The player
+        :param n: The number of drawn cards
+        :param top: The id of the last played card, to lower the odds of the playable cards
+        :param color: The active color
+        :param pending: The draw stack the player did not counter
+        :param kinds: The drawn card ids, when the observer can see them
+        """
+        if player == self.observer:
+            for kind in kinds or ():
+                self.unseen[kind] -= 1
+        else:
+            weight = self.weights[player]
+            if top is not None:
+                weight[self.legal(top, color, pending > 0)] *= self.decay
+            # the new cards are random ones, they dilute what was known about the hand
+            size = self.sizes[player]
+            weight *= size / (size + n)
+            weight += n / (size + n)
+        self.sizes[player] += n
+
+    def distribution(self, player: object) -> np.ndarray:
+        """Probability of each card id for one card of the player hand"""
+        mass = self.unseen * self.weights[player]
+        total = mass.sum()
+        return mass / total if total else mass
+
+    def expected(self, player: object) -> np.ndarray:
+        """Expected count of each card id in the player hand"""
+        return self.distribution(player) * self.sizes[player]
+
+    def holds(self, player: object, kinds: np.ndarray) -> float:
+        """
+        Probability the player has at least one of the cards
+
+        :param kinds: A mask or a list of card ids
+        """
+        return 1 - (1 - self.distribution(player)[kinds].sum()) ** self.sizes[player]
+
+    def can_play(self, player: object, top: int, color: int, pending: int = 0) -> float:
+        return self.holds(player, self.legal(top, color, pending > 0))
+
+    def played(self, player: str, card: object) -> None:
+        """`Cards.play` hook"""
+        self.play(player, self.rules.kind(card))
+
+    def picked(self, player: str, card: object, cards: "Cards", forced: bool = False) -> None:
+        """
+        `Cards.pick_card` hook, called before the card is taken
+
+        A forced draw (turn timeout) tells nothing about the hand: the new card only
+        dilutes the weights, the playable ones are not lowered.
+        """
+        top = cards.last_card if cards.played and not forced else None
+        kind = self.rules.kind(top) if top is not None else None
+        color = self.rules.colors.index(top.color) if top is not None and top.color in self.rules.colors else -1
+        pending = sum(self.rules.draw[self.rules.kind(c)] for c in cards.pile)
+        self.pick(player, 1, kind, color, pending, [self.rules.kind(card)])
+
+
+if __name__ == "__main__":
+    import random
+
+    rules = Rules.from_file()
+    state = rules.deal(2, rng=random.Random(0))
+    beliefs = Beliefs(rules, [0, 1], 0, state.hands[0])
+    beliefs.sizes[1] = len(state.hands[1])
+    top = state.top
+    print(f"seat 1 can play on {rules.name(top)}: {beliefs.can_play(1, top, state.color):.3f}")
+    beliefs.pick(1, 1, top, state.color)
+    print(f"after drawing instead: {beliefs.can_play(1, top, state.color):.3f}")
+
+    # a draw forced by the turn clock only dilutes, a chosen one also lowers the playable cards
+    from types import SimpleNamespace
+
+    card = lambda kind: SimpleNamespace(color=rules.kinds[kind][0], value=rules.kinds[kind][1])
+    game = SimpleNamespace(played=[card(top)], last_card=card(top), pile=[])
+    odds = {}
+    for forced in (False, True):
+        beliefs = Beliefs(rules, [0, 1], 0, state.hands[0])
+        beliefs.sizes[1] = len(state.hands[1])
+        beliefs.picked(1, card(state.draw[-1]), game, forced)
+        odds[forced] = beliefs.can_play(1, top, state.color)
+    assert odds[False] < odds[True], "a timed out player did not decline to play"
+    print(f"after a chosen draw {odds[False]:.3f}, after a timeout {odds[True]:.3f}")
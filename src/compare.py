@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from statistics import NormalDist
+import math
+
+import numpy as np
+
+from src.rules import Rules
+from src.simulator import play_game
+
+METRICS: dict[str:callable] = {
+    "first_seat_wins": lambda record: float(record.winner_seat == 0),
+    "turns": lambda record: float(record.turns),
+    "max_stack": lambda record: float(max(record.stacks, default=0)),
+}
+
+
+@dataclass
+class Comparison:
+    games: int
+    mean_a: float
+    mean_b: float
+    diff: float
+    stderr: float
+    half_width: float
+
+    @property
+    def significant(self) -> bool:
+        return abs(self.diff) > self.half_width
+
+    def __repr__(self) -> str:
+        return f"A {self.mean_a:.4f} B {self.mean_b:.4f} diff {self.diff:+.4f} ± {self.half_width:.4f} over {self.games} games{' (significant)' if self.significant else ''}"
+
+
+def boundaries(fractions: list[float], alpha: float, points: int = 4001) -> list[float]:
+    """
+    z boundaries of a group sequential test, O'Brien-Fleming type alpha spending
+
+    At the information fraction t, alpha(t) = 2 - 2 Phi(z / sqrt(t)) has been spent, z
+    being the fixed sample boundary. The boundary of a look is set so that two equal
+    decks cross it, without having crossed an earlier one, with the probability spent
+    since the previous look: the density of the score of the runs still going is carried
+    from look to look on a grid (Armitage, McPherson and Rowe recursion). The overall
+    false positive rate is alpha whatever the number of looks.
+
+    :param fractions: The share of the games played at each look, increasing up to 1
+    :param alpha: The false positive rate
+    :param points: The size of the grid
+
+    :return: The boundary of each look, inf when nothing is spent there
+    """
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - alpha / 2)
+    # the score is a brownian motion over t, the grid covers 8 standard deviations at t = 1
+    x = np.linspace(-8, 8, points)
+    h = x[1] - x[0]
+    # the grid from the outside in, to sum the mass beyond each |x|
+    order = np.argsort(-np.abs(x), kind="stable")
+    density = np.zeros(points)
+    density[points // 2] = 1.0
+    bounds, spent, last = [], 0.0, 0.0
+    for t in fractions:
+        width = int(8 * math.sqrt(t - last) / h)
+        kernel = np.exp(-0.5 * (np.arange(-width, width + 1) * h) ** 2 / (t - last))
+        density = np.convolve(density, kernel / kernel.sum(), "same")
+        total = 2 - 2 * normal.cdf(z / math.sqrt(t))
+        tail = np.cumsum(density[order])
+        crossed = int(np.searchsorted(tail, total - spent, side="right"))
+        if crossed == 0 or tail[crossed - 1] == 0:
+            bounds.append(math.inf)
+        else:
+            c = abs(x[order[crossed - 1]])
+            bounds.append(float(c / math.sqrt(t)))
+            density[np.abs(x) >= c] = 0.0
+            spent += tail[crossed - 1]
+        last = t
+    return bounds
+
+
+def compare(a: Rules, b: Rules, metric: "str | callable" = "first_seat_wins", seats: int = 2, seed: int = 0, max_games: int = 100_000, batch: int = 500, confidence: float = 0.95, tolerance: float = 0.0, **kwargs) -> Comparison:
+    """
+    Compare two decks on the same games
+
+    Game i of both variants uses the same deal and the same policy random numbers
+    (common random numbers), so the per game differences vary less than between two
+    independent runs. The difference is tested after every batch against the
+    `boundaries` of the planned looks, the run stops once it is significant at
+    `confidence` or once the interval is narrower than `tolerance`.
+
+    Antithetic deals were tried and left out: neither the mirrored shuffle nor the
+    rotated hands made the differences of a pair negatively correlated.
+
+    :param a: The first deck
+    :param b: The second deck
+    :param metric: A key of METRICS, or a function of a GameRecord
+    :param kwargs: Given to `play_game`
+
+    :return: The comparison, its half width is the boundary of the last look times the
+        standard error
+    """
+    metric = METRICS[metric] if isinstance(metric, str) else metric
+    bounds = boundaries([min(n + batch, max_games) / max_games for n in range(0, max_games, batch)], 1 - confidence)
+    n, sum_a, sum_b, sum_d, sum_d2 = 0, 0.0, 0.0, 0.0, 0.0
+    result = None
+    for z in bounds:
+        for game in range(n, min(n + batch, max_games)):
+            x_a, x_b = metric(play_game(a, seats, seed, game, **kwargs)), metric(play_game(b, seats, seed, game, **kwargs))
+            sum_a, sum_b, sum_d, sum_d2 = sum_a + x_a, sum_b + x_b, sum_d + x_a - x_b, sum_d2 + (x_a - x_b) ** 2
+            n += 1
+        diff = sum_d / n
+        stderr = math.sqrt(max(0.0, sum_d2 / n - diff**2) / max(1, n - 1))
+        result = Comparison(n, sum_a / n, sum_b / n, diff, stderr, z * stderr)
+        if n > 1 and (result.significant or result.half_width < tolerance):
+            break
+    return result
+
+
+if __name__ == "__main__":
+    base = Rules.from_file(layers=("cards",))
+    print(compare(base, base, "turns", max_games=200))
+    print(compare(base, Rules.from_file(layers=("cards", "addons")), "turns", max_games=2000, max_turns=300))
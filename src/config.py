@@ -0,0 +1,199 @@
+import contextlib, io, json, os, re, shutil, tempfile, time
+
+DEFAULT_LAYERS = ("cards", "addons")
+
+
+class DeckConfig:
+    """
+    deck.json loader composing any number of layers on top of the template
+
+    A layer is a top level entry of deck.json ("cards", "addons", ...) or a pack file
+    `packs/<name>.json` next to it. Composed decks and what is compiled from them are
+    memoized per layer combination. The files are checked for changes at most every
+    `interval` seconds, a change drops the memoized decks.
+    """
+
+    instances: dict[str:"DeckConfig"] = {}
+
+    def __init__(self, path: str = "deck.json", interval: float = 1) -> None:
+        self.path: str = path
+        self.packs: str = os.path.join(os.path.dirname(path), "packs")
+        self.interval: float = interval
+        self.config: dict = {}
+        self.files: dict[str : tuple[float, int]] = {}
+        self.decks: dict[tuple[str] : dict[str : list[str]]] = {}
+        self.compiled: dict[tuple : object] = {}
+        self.version: int = 0
+        self.error: Exception | None = None
+        self.__checked: float = 0
+        self.__failed: dict[str : tuple[float, int]] | None = None
+        self.load()
+
+    @classmethod
+    def open(cls, path: str = "deck.json") -> "DeckConfig":
+        """The shared engine of a file"""
+        if path not in cls.instances:
+            cls.instances[path] = cls(path)
+        return cls.instances[path]
+
+    def load(self) -> None:
+        """
+        Read the files again, the decks composed so far are composed again right away
+
+        If deck.json is invalid, the previous config is kept and the error raised. A
+        layer combination which does not compose anymore (a pack removed or broken) is
+        dropped and reported, it raises again if it is asked for.
+        """
+        config = self.__read(self.path)
+        if not isinstance(config.get("template"), dict):
+            raise ValueError(f"{self.path} has no template")
+        for r in config.get("regex", []):
+            re.compile(r)
+        composed = self.decks
+        self.config = config
+        self.files = {self.path: self.__stat(self.path)}
+        self.decks, self.compiled = {}, {}
+        for layers in composed:
+            try:
+                self.compose(layers)
+            except (OSError, ValueError) as e:
+                print(f"{self.path}: layers {', '.join(layers)} dropped: {e}")
+        self.version += 1
+        self.error = None
+        self.__failed = None
+        self.__checked = time.monotonic()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the files if one of them changed
+
+        :param force: Check now, whatever the interval
+
+        :return: True if the config was reloaded, False if nothing changed or if the
+            new deck.json is invalid: the last good config is kept, the error stored in
+            `error`, printed once per new state of the files, and the reload tried again
+            after the next interval
+        """
+        if not force and time.monotonic() - self.__checked < self.interval:
+            return False
+        self.__checked = time.monotonic()
+        stats = {path: self.__stat(path) for path in self.files}
+        if stats == self.files:
+            return False
+        try:
+            self.load()
+        except (OSError, ValueError, re.error) as e:
+            self.error = e
+            if stats != self.__failed:
+                self.__failed = stats
+                print(f"{self.path} not reloaded, keeping the last good config: {e}")
+            return False
+        return True
+
+    @property
+    def regex(self) -> list[str]:
+        self.refresh()
+        return self.config.get("regex", [])
+
+    def layer(self, name: str) -> dict[str : list[str]]:
+        if isinstance(self.config.get(name), dict):
+            layer = self.config[name]
+        else:
+            path = os.path.join(self.packs, f"{name}.json")
+            if not os.path.exists(path):
+                raise ValueError(f"Unknown deck layer {name}")
+            layer = self.__read(path)
+            self.files[path] = self.__stat(path)
+        for key, values in layer.items():
+            if key not in self.config["template"]:
+                raise ValueError(f"Layer {name}: unknown key {key}")
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise ValueError(f"Layer {name}: {key} must be a list of strings")
+        return layer
+
+    def deck(self, layers: tuple[str] = DEFAULT_LAYERS) -> dict[str : list[str]]:
+        """
+        Compose the template and the layers, in order
+
+        :param layers: The layer names
+
+        :return: The deck, the lists of every layer appended to each other
+        """
+        self.refresh()
+        return self.compose(tuple(layers))
+
+    def compose(self, layers: tuple[str]) -> dict[str : list[str]]:
+        if layers not in self.decks:
+            deck = {key: list(values) for key, values in self.config["template"].items()}
+            for name in layers:
+                for key, values in self.layer(name).items():
+                    deck[key] = deck.get(key, []) + values
+            self.validate(deck)
+            self.decks[layers] = deck
+        return self.decks[layers]
+
+    def compile(self, layers: tuple[str], factory: callable) -> object:
+        """
+        Build an object from a composed deck once per layer combination
+
+        :param layers: The layer names
+        :param factory: Called with the deck and the regex, `Rules` for instance
+
+        :return: The memoized object
+        """
+        deck = self.deck(layers)
+        if (tuple(layers), factory) not in self.compiled:
+            self.compiled[tuple(layers), factory] = factory(deck, self.regex)
+        return self.compiled[tuple(layers), factory]
+
+    @staticmethod
+    def validate(deck: dict[str : list[str]]) -> None:
+        if not deck.get("color"):
+            raise ValueError("The deck has no color")
+        if "wild" in deck["color"]:
+            raise ValueError("wild is not a color")
+        if not any(deck.get(key) for key in ("classic", "sp_counter", "sp_no_counter")):
+            raise ValueError("The deck has no colored card")
+
+    @staticmethod
+    def __read(path: str) -> dict:
+        with open(path) as file:
+            return json.load(file)
+
+    @staticmethod
+    def __stat(path: str) -> tuple[float, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+if __name__ == "__main__":
+    config = DeckConfig.open()
+    for layers in [("cards",), ("cards", "addons")]:
+        deck = config.deck(layers)
+        print(layers, {key: len(values) for key, values in deck.items()})
+
+    # hot reload: a removed pack does not block the next edits, a broken file is reported once
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "deck.json")
+        shutil.copy("deck.json", path)
+        os.mkdir(os.path.join(tmp, "packs"))
+        with open(os.path.join(tmp, "packs", "swap.json"), "w") as file:
+            json.dump({"sp_no_counter": ["swap"]}, file)
+        local = DeckConfig(path, interval=0)
+        local.deck(("cards", "swap"))
+        os.remove(os.path.join(tmp, "packs", "swap.json"))
+        edited = local.config | {"mini": {"classic": ["20"]}}
+        with open(path, "w") as file:
+            json.dump(edited, file)
+        assert local.refresh() and local.deck(("cards", "mini"))["classic"][-1] == "20", "a removed pack must not block the reload"
+        with open(path, "w") as file:
+            file.write("{broken")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for _ in range(5):
+                assert not local.refresh()
+        assert output.getvalue().count("not reloaded") == 1 and local.deck(("cards", "mini")), "report once, keep the last good config"
+        print("hot reload ok")
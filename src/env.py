@@ -0,0 +1,133 @@
+import random
+
+import numpy as np
+
+from src.rules import Rules, State
+
+
+class VectorEnv:
+    """
+    N independent games stepped together, gym style
+
+    The agent plays the seat to move in every game (self play). Observations are from
+    that seat point of view:
+    hand count per card id | top card one-hot | active color one-hot | draw stack | direction | next hand sizes
+
+    Actions index `self.moves`: one per colored card id, one per (wild card id, color),
+    and the last one to pick. Finished games are reset on the spot, the returned
+    observation is the first one of the new game.
+    """
+
+    def __init__(self, n: int, seats: int = 2, rules: Rules = None, nb_card: int = 7, max_turns: int = 500, seed: int = None) -> None:
+        self.n: int = n
+        self.seats: int = seats
+        self.rules: Rules = rules or Rules.from_file()
+        self.nb_card: int = nb_card
+        self.max_turns: int = max_turns
+        self.rng: random.Random = random.Random(seed)
+        self.np_rng: np.random.Generator = np.random.default_rng(seed)
+        self.states: list[State] = []
+
+        rules = self.rules
+        colors = range(len(rules.colors))
+        self.moves: list[tuple[int, int] | None] = [(k, c) for k in range(len(rules)) for c in (colors if rules.wild[k] else [rules.color[k]])] + [None]
+        self.actions: dict[tuple[int, int] | None : int] = {move: i for i, move in enumerate(self.moves)}
+        self.pick: int = len(self.moves) - 1
+        # legal moves by card id, a wild card id opens all its color actions
+        self.kind_actions: list[list[int]] = [[i for i, m in enumerate(self.moves) if m and m[0] == k] for k in range(len(rules))]
+
+        size = len(rules)
+        self.slices: dict[str:slice] = {
+            "hand": slice(0, size),
+            "top": slice(size, 2 * size),
+            "color": slice(2 * size, 2 * size + len(rules.colors)),
+            "pending": slice(2 * size + len(rules.colors), 2 * size + len(rules.colors) + 1),
+            "direction": slice(2 * size + len(rules.colors) + 1, 2 * size + len(rules.colors) + 2),
+            "opponents": slice(2 * size + len(rules.colors) + 2, 2 * size + len(rules.colors) + 1 + seats),
+        }
+        self.obs_size: int = 2 * size + len(rules.colors) + 1 + seats
+        self.obs: np.ndarray = np.zeros((n, self.obs_size), dtype=np.float32)
+        self.mask: np.ndarray = np.zeros((n, len(self.moves)), dtype=bool)
+
+    @property
+    def n_actions(self) -> int:
+        return len(self.moves)
+
+    def reset(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Start every game
+
+        :return: The observations (n, obs_size) and legal action masks (n, n_actions)
+        """
+        self.states = [self.rules.deal(self.seats, self.nb_card, random.Random(self.rng.getrandbits(64))) for _ in range(self.n)]
+        for i in range(self.n):
+            self.__encode(i)
+        return self.obs.copy(), self.mask.copy()
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Play one action in every game
+
+        :param actions: The action index for each game, must be legal
+
+        :return: observations, rewards (for the seat which acted), dones, truncated, masks
+        """
+        rewards = np.zeros(self.n, dtype=np.float32)
+        dones = np.zeros(self.n, dtype=bool)
+        truncated = np.zeros(self.n, dtype=bool)
+        for i, action in enumerate(actions):
+            state = self.states[i]
+            if not self.mask[i, action]:
+                raise ValueError(f"Illegal action {action} in game {i}")
+            state.apply(self.moves[action])
+            if state.winner is not None or state.turns >= self.max_turns:
+                rewards[i] = state.winner is not None
+                dones[i] = state.winner is not None
+                truncated[i] = state.winner is None
+                self.states[i] = self.rules.deal(self.seats, self.nb_card, state.rng)
+            self.__encode(i)
+        return self.obs.copy(), rewards, dones, truncated, self.mask.copy()
+
+    def sample(self) -> np.ndarray:
+        """A random legal action for every game"""
+        noise = self.np_rng.random(self.mask.shape) * self.mask
+        return noise.argmax(axis=1)
+
+    def __encode(self, i: int) -> None:
+        state, obs, mask, s = self.states[i], self.obs[i], self.mask[i], self.slices
+        obs[:] = 0
+        size = len(self.rules)
+        obs[s["hand"]] = np.bincount(state.hands[state.current], minlength=size)
+        obs[s["top"].start + state.top] = 1
+        if state.color >= 0:
+            obs[s["color"].start + state.color] = 1
+        obs[s["pending"]] = state.pending
+        obs[s["direction"]] = state.direction
+        obs[s["opponents"]] = [len(state.hands[(state.current + state.direction * j) % self.seats]) for j in range(1, self.seats)]
+
+        mask[:] = False
+        for k in state.playable():
+            mask[self.kind_actions[k]] = True
+        mask[self.pick] = True
+
+
+if __name__ == "__main__":
+    import time
+
+    env = VectorEnv(256, seed=0)
+    obs, mask = env.reset()
+    start, steps, games = time.time(), 0, 0
+    while time.time() - start < 2:
+        obs, rewards, dones, truncated, mask = env.step(env.sample())
+        steps += env.n
+        games += dones.sum() + truncated.sum()
+    print(f"{steps / (time.time() - start):.0f} steps/s, {games} games, obs {obs.shape}, actions {env.n_actions}")
+
+    # the same seed gives the same rollout
+    rollouts = []
+    for _ in range(2):
+        env = VectorEnv(8, seed=1)
+        env.reset()
+        rollouts.append([env.step(env.sample())[0] for _ in range(100)])
+    assert all((a == b).all() for a, b in zip(*rollouts)), "seeded rollouts must be reproducible"
+    print("seeded rollouts ok")
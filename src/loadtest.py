@@ -0,0 +1,135 @@
+import asyncio, json, math, platform, random, sys, time
+
+from src.rules import Rules
+from src.simulator import greedy_policy
+
+
+class Histogram:
+    """
+    Log-linear latency histogram, HDR style
+
+    Values (ns) are bucketed with `digits` significant digits: the relative error of a
+    percentile is below 10 ** (1 - digits) whatever the magnitude, in a fixed small memory.
+    """
+
+    def __init__(self, digits: int = 3) -> None:
+        self.digits: int = digits
+        self.sub: int = 10**digits
+        self.counts: dict[int:int] = {}
+        self.total: int = 0
+        self.max: int = 0
+
+    def __len__(self) -> int:
+        return self.total
+
+    def bucket(self, value: int) -> int:
+        if value < self.sub:
+            return value
+        exponent = int(math.log10(value)) - self.digits + 1
+        return exponent * self.sub + value // 10**exponent
+
+    def value(self, bucket: int) -> int:
+        exponent, mantissa = divmod(bucket, self.sub)
+        return bucket if exponent == 0 else mantissa * 10**exponent
+
+    def record(self, value: int) -> None:
+        bucket = self.bucket(max(0, value))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> int:
+        if not self.total:
+            return 0
+        rank, seen = math.ceil(q / 100 * self.total), 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return self.value(bucket)
+        return self.max
+
+    def summary(self) -> dict[str:float]:
+        """Percentiles in microseconds"""
+        return {"count": self.total, **{f"p{q:g}".replace(".", ""): self.percentile(q) / 1000 for q in (50, 90, 99, 99.9)}, "max": self.max / 1000}
+
+
+class LoadTest:
+    """
+    Synthetic clients hosted in one process
+
+    Every client owns a table and plays the seat to move with the greedy policy, one
+    action every `think` seconds. The latency of each `play`, `pick` and special card
+    resolution is recorded, with the scheduling lag of the event loop: when the process
+    hosts too many tables the lag tail grows first.
+
+    The tables are `State` games, the compiled rules of `Cards`, not `Cards` itself:
+    `Cards.play` cannot get past its `Card <= Card` check yet, and `pick_card` shows a
+    Windows toast. The latencies measure the game logic, without the console and the
+    notifications around it.
+    """
+
+    def __init__(self, rules: Rules = None, seats: int = 4, think: float = 0.05, seed: int = 0) -> None:
+        self.rules: Rules = rules or Rules.from_file()
+        self.seats: int = seats
+        self.think: float = think
+        self.seed: int = seed
+        self.histograms: dict[str:Histogram] = {}
+        self.ops: int = 0
+
+    def record(self, op: str, value: int) -> None:
+        if op not in self.histograms:
+            self.histograms[op] = Histogram()
+        self.histograms[op].record(value)
+
+    async def client(self, i: int, stop: float) -> None:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        state = self.rules.deal(self.seats, rng=rng)
+        await asyncio.sleep(rng.random() * self.think)
+        while (now := time.perf_counter()) < stop:
+            due = now + self.think
+            await asyncio.sleep(self.think)
+            self.record("lag", int((time.perf_counter() - due) * 1e9))
+            move = greedy_policy(state, rng)
+            start = time.perf_counter_ns()
+            state.apply(move)
+            elapsed = time.perf_counter_ns() - start
+            self.record("pick" if move is None else "special" if self.rules.special[move[0]] or self.rules.wild[move[0]] else "play", elapsed)
+            self.ops += 1
+            if state.winner is not None:
+                state = self.rules.deal(self.seats, rng=rng)
+
+    async def stage(self, clients: int, duration: float) -> dict:
+        self.histograms, self.ops = {}, 0
+        start = time.perf_counter()
+        await asyncio.gather(*[self.client(i, start + duration) for i in range(clients)])
+        elapsed = time.perf_counter() - start
+        return {"clients": clients, "ops": self.ops, "throughput": round(self.ops / elapsed, 1), **{op: h.summary() for op, h in sorted(self.histograms.items())}}
+
+    def run(self, ramp: list[int] = (10, 100, 1000, 5000), duration: float = 5) -> list[dict]:
+        """
+        Run one stage per concurrency level
+
+        :param ramp: The number of clients of each stage
+        :param duration: The length of each stage in seconds
+
+        :return: One result per stage
+        """
+        return [asyncio.run(self.stage(clients, duration)) for clients in ramp]
+
+    def report(self, results: list[dict]) -> str:
+        """The results as a json document, with what makes two runs comparable"""
+        header = {"deck": self.rules.digest, "seats": self.seats, "think": self.think, "seed": self.seed, "python": sys.version.split()[0], "machine": platform.machine()}
+        return json.dumps({"run": header, "stages": results}, indent=4)
+
+
+if __name__ == "__main__":
+    test = LoadTest()
+    results = test.run([10, 100, 1000], 2)
+    for result in results:
+        print(result["clients"], result["throughput"], "lag p99", result["lag"]["p99"], "play p999", result["play"]["p999"])
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+import random, sys, tracemalloc
+
+from src.rules import Rules
+
+Cards = any
+
+
+def deep_size(obj: object, seen: set[int] = None, skip: tuple[str] = ("app", "player", "rules", "rng")) -> int:
+    """
+    Bytes of an object and of everything it holds, by `sys.getsizeof`
+
+    :param obj: The object
+    :param seen: The ids already counted, shared between calls to count each object once
+    :param skip: Attributes not followed: back references to the game and shared objects
+
+    :return: The size in bytes
+    """
+    seen = set() if seen is None else seen
+    size, stack = 0, [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__") and not isinstance(obj, type):
+            seen.add(id(obj.__dict__))
+            size += sys.getsizeof(obj.__dict__)
+            stack.extend(value for key, value in obj.__dict__.items() if key not in skip)
+        for key in getattr(type(obj), "__slots__", ()):
+            if key not in skip and hasattr(obj, key):
+                stack.append(getattr(obj, key))
+    return size
+
+
+def footprint(cards: "Cards") -> dict[str:int]:
+    """
+    Bytes of a `Cards` game by part, each object counted once, in the first part holding it
+
+    :param cards: The game
+
+    :return: Bytes of the Card objects, the Player lists, the pile, the played list, the
+        draw pile, the deck dict and the total. The lists of the deck and the regex belong
+        to the shared `DeckConfig`, they are not charged to the game.
+    """
+    seen: set[int] = set(map(id, cards.deck))
+    for values in [*cards.deck.values(), cards.regex]:
+        seen.update(map(id, [values, *values]))
+    report = {"cards": 0}
+    for card in [*cards.cards, *cards.played, *(card for player in cards.players.values() for card in player)]:
+        report["cards"] += deep_size(card, seen)
+    report["players"] = deep_size(cards.players, seen)
+    report["pile"] = deep_size(cards.pile, seen)
+    report["played"] = deep_size(cards.played, seen)
+    report["draw_pile"] = deep_size(cards.cards, seen)
+    report["deck"] = deep_size(cards.deck, seen)
+    report["total"] = sum(report.values()) + deep_size(cards, seen)
+    return report
+
+
+def table_size(table: object) -> int:
+    """`footprint` total of a `Cards` game, `deep_size` of anything else (a compact `State`)"""
+    if hasattr(table, "deck") and hasattr(table, "regex"):
+        return footprint(table)["total"]
+    return deep_size(table)
+
+
+def traced(factory: callable, games: int = 100) -> float:
+    """
+    Bytes allocated per game, measured by tracemalloc
+
+    :param factory: Builds one game
+    :param games: The number of games built, kept alive during the measure
+
+    :return: The allocated bytes divided by the number of games
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [factory() for _ in range(games)]
+    after = tracemalloc.take_snapshot()
+    if not started:
+        tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size / games
+
+
+class TableManager:
+    """
+    Tables kept under a memory budget
+
+    Each table is charged its `measure` when opened, `table_size` by default. Past the
+    budget a new table is refused (MemoryError), or with `evict` the least recently used
+    tables are closed.
+    """
+
+    def __init__(self, budget: int, evict: bool = False, measure: callable = None, on_evict: callable = None) -> None:
+        self.budget: int = budget
+        self.evict: bool = evict
+        self.measure: callable = measure or table_size
+        self.on_evict: callable = on_evict
+        self.tables: OrderedDict[object : tuple[object, int]] = OrderedDict()
+        self.used: int = 0
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.tables
+
+    def open(self, key: object, factory: callable) -> object:
+        """
+        Create a table if it fits in the budget
+
+        :param key: The table id
+        :param factory: Builds the table
+
+        :return: The table
+        """
+        table = factory()
+        size = self.measure(table)
+        if size > self.budget:
+            raise MemoryError(f"A table needs {size} bytes, the budget is {self.budget}")
+        while self.used + size > self.budget:
+            if not self.evict or not self.tables:
+                raise MemoryError(f"No room for table {key}: {self.used} of {self.budget} bytes used")
+            self.close(next(iter(self.tables)))
+        self.tables[key] = (table, size)
+        self.used += size
+        return table
+
+    def get(self, key: object) -> object:
+        self.tables.move_to_end(key)
+        return self.tables[key][0]
+
+    def close(self, key: object) -> None:
+        table, size = self.tables.pop(key)
+        self.used -= size
+        if self.on_evict is not None:
+            self.on_evict(key, table)
+
+    def report(self) -> dict[str:int]:
+        return {"tables": len(self.tables), "used": self.used, "budget": self.budget, "per_table": self.used // max(1, len(self.tables))}
+
+
+if __name__ == "__main__":
+    rules = Rules.from_file()
+    print(f"{traced(lambda: rules.deal(4, rng=random.Random(0))):.0f} bytes per compact game")
+    manager = TableManager(1_000_000, evict=True)
+    for i in range(200):
+        manager.open(i, lambda: rules.deal(4, rng=random.Random(i)))
+    print(manager.report())
+
+    # a Cards table is charged its footprint, without the lists shared with DeckConfig
+    from types import SimpleNamespace
+
+    from src.card import Card
+    from src.config import DeckConfig
+    from src.pile import Pile
+
+    config = DeckConfig.open()
+    game = SimpleNamespace(regex=config.regex, deck=config.deck().copy(), played=[], players={}, pile=Pile())
+    game.cards = [Card(color, value, game) for color in game.deck["color"] for value in game.deck["classic"]]
+    game.players = {"a": [game.cards.pop() for _ in range(7)], "b": [game.cards.pop() for _ in range(7)]}
+    manager = TableManager(1_000_000)
+    manager.open("cards", lambda: game)
+    assert manager.used == footprint(game)["total"] < deep_size(game), "the shared deck lists must not be charged"
+    print(f"{manager.used} bytes per Cards table")
@@ -0,0 +1,95 @@
+import random, time
+
+from src.rules import Rules, State
+from src.simulator import greedy_policy, simulate
+
+# hand size -> bucket, sizes past the end use the last bucket
+OPPONENT_BUCKETS = [0, 0, 1, 1, 2]
+OWN_BUCKETS = [0, 0, 0, 1, 1, 1, 1, 2]
+
+
+def prefer_counters(rules: Rules, kind: int, pending: int, opponent: int, own: int) -> int:
+    """Draw cards first when a stack is running or the next player is about to win"""
+    if rules.draw[kind] and (pending or opponent == 0):
+        return 30
+    return 10 if (rules.skip[kind] or rules.reverse[kind]) and opponent == 0 else 0
+
+
+def hold_wilds(rules: Rules, kind: int, pending: int, opponent: int, own: int) -> int:
+    """Keep the wild cards for the end of the game"""
+    return -20 if rules.wild[kind] and own > 0 and not pending else 0
+
+
+def dump_high(rules: Rules, kind: int, pending: int, opponent: int, own: int) -> int:
+    """Get rid of the cards worth the most points: face value, 20 for specials, 50 for wilds"""
+    value = rules.kinds[kind][1]
+    points = 50 if rules.wild[kind] else 20 if rules.special[kind] else int(value) if value.isdigit() else 0
+    return points // 5
+
+
+STRATEGIES = [prefer_counters, hold_wilds, dump_high]
+
+
+class PolicyTable:
+    """
+    Heuristic bot compiled into lookup tables
+
+    Every strategy scores a card id in a context (draw stack running, bucket of the next
+    player hand size, bucket of the own hand size). The scores are summed once for every
+    context and card id, at play time a decision is one row lookup per playable card and
+    the wild color is the most held one.
+    """
+
+    def __init__(self, rules: Rules, strategies: list[callable] = STRATEGIES) -> None:
+        self.rules: Rules = rules
+        self.strategies: list[callable] = strategies
+        opponents, owns = max(OPPONENT_BUCKETS) + 1, max(OWN_BUCKETS) + 1
+        self.table: list[list[int]] = [
+            [sum(strategy(rules, kind, pending, opponent, own) for strategy in strategies) * len(rules) - kind for kind in range(len(rules))]
+            for pending in range(2)
+            for opponent in range(opponents)
+            for own in range(owns)
+        ]
+        self.opponent: list[int] = [bucket * owns for bucket in OPPONENT_BUCKETS]
+        self.pending: int = opponents * owns
+        self.color: list[int] = rules.color
+        self.colors: int = len(rules.colors)
+
+    def row(self, state: State) -> list[int]:
+        hand, following = len(state.hands[state.current]), len(state.hands[state.next])
+        index = self.opponent[min(following, len(self.opponent) - 1)] + OWN_BUCKETS[min(hand, len(OWN_BUCKETS) - 1)]
+        return self.table[index + self.pending if state.pending else index]
+
+    def choose_color(self, hand: list[int]) -> int:
+        counts = [0] * self.colors
+        for kind in hand:
+            if self.color[kind] >= 0:
+                counts[self.color[kind]] += 1
+        return counts.index(max(counts))
+
+    def policy(self, state: State, rng: random.Random = None) -> tuple[int, int] | None:
+        """Simulator policy: the playable card with the best score, None to pick"""
+        playable = state.playable()
+        if not playable:
+            return None
+        kind = max(playable, key=self.row(state).__getitem__)
+        if self.color[kind] < 0:
+            return kind, self.choose_color([k for k in state.hands[state.current] if k != kind])
+        return kind, self.color[kind]
+
+    __call__ = policy
+
+
+if __name__ == "__main__":
+    rules = Rules.from_file(layers=("cards",))
+    bot = PolicyTable(rules)
+    state = rules.deal(4, rng=random.Random(0))
+    start, n = time.perf_counter(), 100_000
+    for _ in range(n):
+        bot(state)
+    print(f"{(time.perf_counter() - start) / n * 1e6:.2f} µs per decision")
+
+    # the table bot against the greedy one, seat 0 against 1
+    mixed = lambda state, rng: bot(state) if state.current == 0 else greedy_policy(state, rng)
+    records = simulate(rules, 2000, policy=mixed)
+    print(f"table bot wins {sum(r.winner_seat == 0 for r in records) / len(records):.3f} of the games against greedy")
@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
+import json, mmap, os, tempfile, time
+
+from src.rules import Rules
+from src.simulator import play_game
+
+
+def write_log(path: str, rules: Rules, games: int, seats: int = 2, seed: int = 0, nb_card: int = 7, **kwargs) -> None:
+    """
+    Play games and append them to a log, one json line per game
+
+    A line holds seats, nb_card, winner (None if unfinished), turns and the moves as
+    [seat, card name or "" to pick, drawn cards]. Seat 0 is the first to play.
+    """
+    with open(path, "a") as file:
+        for game in range(games):
+            moves = []
+            record = play_game(rules, seats, seed, game, nb_card=nb_card, log=moves, **kwargs)
+            line = {"game": game, "seats": seats, "nb_card": nb_card, "winner": record.winner_seat, "turns": record.turns, "moves": moves}
+            file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+
+def analyze_game(game: dict, result: dict) -> None:
+    result["games"] += 1
+    seats, winner = game["seats"], game["winner"]
+    turns = result["turns"].setdefault(seats, {})
+    turns[game["turns"]] = turns.get(game["turns"], 0) + 1
+    if winner is None:
+        result["unfinished"] += 1
+    else:
+        wins = result["wins"].setdefault(seats, {})
+        wins[winner] = wins.get(winner, 0) + 1
+
+    sizes = [game["nb_card"]] * seats
+    direction, swing, special = 1, False, False
+    for seat, card, drawn in game["moves"]:
+        if not card:
+            sizes[seat] += drawn
+            continue
+        sizes[seat] -= 1
+        value = card.rsplit(" ", 1)[-1]
+        if value not in ("skip", "reverse"):
+            continue
+        special = True
+        result[value] += 1
+        if not sizes[seat]:
+            # the winning card, nobody is denied anything
+            continue
+        # the seat which lost its turn: the next one for a skip, the one which would
+        # have played without the reverse (nobody when the reverse gives it back its turn)
+        denied = (seat + direction) % seats
+        if value == "reverse":
+            direction = -direction
+            if denied == (seat + direction) % seats:
+                continue
+        if seat == winner and sizes[denied] == 1:
+            swing = True
+    result["special_games"] += special
+    result["swings"] += swing
+
+
+def analyze_chunk(path: str, start: int, end: int) -> dict:
+    """
+    Aggregate the games of the lines starting in [start, end) of a log
+
+    :return: The partial result, to merge
+    """
+    result = {"games": 0, "unfinished": 0, "wins": {}, "turns": {}, "skip": 0, "reverse": 0, "special_games": 0, "swings": 0}
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # a line belongs to the chunk where it starts
+        if start and data[start - 1] != ord("\n"):
+            start = data.find(b"\n", start) + 1 or end
+        while start < end:
+            stop = data.find(b"\n", start)
+            stop = len(data) if stop < 0 else stop
+            if stop > start:
+                analyze_game(json.loads(data[start:stop]), result)
+            start = stop + 1
+    return result
+
+
+def merge(a: dict, b: dict) -> dict:
+    for key, value in b.items():
+        if isinstance(value, dict):
+            merge(a.setdefault(key, {}), value)
+        else:
+            a[key] = a.get(key, 0) + value
+    return a
+
+
+def analyze(paths: list[str], workers: int = None, chunk: int = 16 * 1024 * 1024) -> dict:
+    """
+    Aggregate game logs over a process pool
+
+    Files are split in byte ranges of about `chunk` bytes, every worker memory maps its
+    file and parses its range only, the partial results are summed.
+
+    :param paths: The log files
+    :param workers: The number of processes, all the cores by default
+    :param chunk: The size of a range
+
+    :return: games, unfinished, wins[seats][seat], turns[seats][turns] counts, skip and
+        reverse counts, special_games (with a skip or reverse), swings (won by a player
+        whose skip or reverse took the turn of an opponent holding one card)
+    """
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        tasks.extend((path, start, min(start + chunk, size)) for start in range(0, size, chunk))
+    result = {"games": 0, "unfinished": 0, "wins": {}, "turns": {}, "skip": 0, "reverse": 0, "special_games": 0, "swings": 0}
+    with ProcessPoolExecutor(workers) as pool:
+        for partial in pool.map(analyze_chunk, *zip(*tasks)) if tasks else []:
+            merge(result, partial)
+    return result
+
+
+def summary(result: dict) -> dict:
+    return {
+        "games": result["games"],
+        "win_rate": {seats: {seat: round(count / sum(wins.values()), 4) for seat, count in sorted(wins.items())} for seats, wins in result["wins"].items()},
+        "mean_turns": {seats: round(sum(t * c for t, c in turns.items()) / sum(turns.values()), 2) for seats, turns in result["turns"].items()},
+        "swing_rate": round(result["swings"] / max(1, result["special_games"]), 4),
+    }
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "games.jsonl")
+        write_log(path, Rules.from_file(layers=("cards",)), 2000, seats=3)
+        start = time.time()
+        result = analyze([path], chunk=64 * 1024)
+        print(summary(result), f"{time.time() - start:.2f}s")
+
+    # swings: only the seat which lost its turn counts, the direction follows the reverses
+    logs = {
+        "skip of the next seat": (3, 2, [[0, "", 1], [1, "red 6", 0], [2, "", 1], [0, "red skip", 0]], True),
+        "skip, the other seat holds one card": (3, 2, [[0, "", 1], [1, "", 1], [2, "red 6", 0], [0, "red skip", 0]], False),
+        "reverse of the would-be next seat": (3, 2, [[0, "", 1], [1, "red 6", 0], [2, "", 1], [0, "red reverse", 0]], True),
+        "reverse giving the turn back": (2, 2, [[0, "", 1], [1, "red 6", 0], [0, "red reverse", 0]], False),
+        "skip after a reverse": (3, 3, [[0, "red reverse", 0], [2, "red 6", 0], [1, "", 1], [0, "", 1], [2, "red 7", 0], [1, "", 1], [0, "red skip", 0]], True),
+    }
+    for name, (seats, nb_card, moves, swing) in logs.items():
+        result = {"games": 0, "unfinished": 0, "wins": {}, "turns": {}, "skip": 0, "reverse": 0, "special_games": 0, "swings": 0}
+        analyze_game({"seats": seats, "nb_card": nb_card, "winner": 0, "turns": len(moves), "moves": moves}, result)
+        assert result["swings"] == swing, name
+    print("swings ok")
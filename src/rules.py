@@ -0,0 +1,270 @@
+import hashlib, json, random
+
+from src.config import DeckConfig, DEFAULT_LAYERS
+from src.regex_in import regex_in
+
+Cards = any
+
+MASK = (1 << 64) - 1
+
+
+def mix(x: int) -> int:
+    """splitmix64 finalizer: a well spread 64 bits integer out of any integer"""
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+class Rules:
+    """
+    Compiled deck: every distinct (color, value) card gets an integer id
+
+    The per-id tables below let the game logic run on plain ints instead of `Card`
+    objects, which is what bots, solvers and simulators need.
+    """
+
+    def __init__(self, deck: dict[str : list[str]], regex: list[str]) -> None:
+        self.deck: dict[str : list[str]] = deck
+        self.colors: list[str] = list(dict.fromkeys(deck["color"]))
+        self.values: list[str] = list(dict.fromkeys(deck["classic"] + deck["sp_counter"] + deck["sp_no_counter"] + deck["wild"]))
+        self.kinds: list[tuple[str, str]] = []
+        self.count: list[int] = []
+        ids: dict[tuple[str, str] : int] = {}
+        for color, value in [(c, v) for c in deck["color"] for v in deck["classic"] + deck["sp_counter"] + deck["sp_no_counter"]] + [("wild", v) for v in deck["wild"]]:
+            if (color, value) not in ids:
+                ids[color, value] = len(self.kinds)
+                self.kinds.append((color, value))
+                self.count.append(0)
+            self.count[ids[color, value]] += 1
+        self.ids: dict[tuple[str, str] : int] = ids
+        # a key per physical card, from its color, value and copy number only
+        self.keys: list[list[int]] = [[int.from_bytes(hashlib.blake2b(f"{c} {v} {copy}".encode(), digest_size=8).digest(), "big") for copy in range(self.count[k])] for k, (c, v) in enumerate(self.kinds)]
+
+        self.color: list[int] = [self.colors.index(c) if c != "wild" else -1 for c, _ in self.kinds]
+        self.value: list[int] = [self.values.index(v) for _, v in self.kinds]
+        self.wild: list[bool] = [c == "wild" for c, _ in self.kinds]
+        self.draw: list[int] = [self.action(v, regex) for _, v in self.kinds]
+        self.skip: list[bool] = [v == "skip" for _, v in self.kinds]
+        self.reverse: list[bool] = [v == "reverse" for _, v in self.kinds]
+        self.special: list[bool] = [v in deck["sp_counter"] or v in deck["sp_no_counter"] or self.draw[k] > 0 for k, (_, v) in enumerate(self.kinds)]
+        self.__legal: dict[tuple[int, int, bool] : list[bool]] = {}
+
+    @staticmethod
+    def action(value: str, regex: list[str]) -> int:
+        """Cards drawn by the next player for a card value, 0 if it is not a draw card"""
+        for r in regex:
+            if (res := regex_in(value)) == r:
+                return int(res[2])
+        return 0
+
+    @classmethod
+    def from_file(cls, path: str = "deck.json", layers: tuple[str] = DEFAULT_LAYERS) -> "Rules":
+        return DeckConfig.open(path).compile(layers, cls)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def name(self, kind: int) -> str:
+        return " ".join(self.kinds[kind])
+
+    def kind(self, card: object) -> int:
+        """
+        Id of a `Card`, wild cards which got a color are found back by value
+
+        :param card: The card to look up
+
+        :return: The card id
+        """
+        return self.ids.get((card.color, card.value), self.ids.get(("wild", card.value)))
+
+    def cards(self) -> list[int]:
+        return [kind for kind, count in enumerate(self.count) for _ in range(count)]
+
+    def legal(self, top: int, color: int, pending: bool) -> list[bool]:
+        """
+        Which card ids can be played
+
+        :param top: The id of the last played card
+        :param color: The active color (the chosen one if top is a wild)
+        :param pending: True if a draw stack is waiting to be countered
+
+        :return: A list indexed by card id
+        """
+        if (top, color, pending) not in self.__legal:
+            if pending:
+                legal = [self.value[k] == self.value[top] for k in range(len(self))]
+            else:
+                legal = [self.wild[k] or self.color[k] == color or self.value[k] == self.value[top] for k in range(len(self))]
+            self.__legal[top, color, pending] = legal
+        return self.__legal[top, color, pending]
+
+    @property
+    def digest(self) -> str:
+        """sha1 of the composed deck, two decks with the same cards share it"""
+        return hashlib.sha1(json.dumps(self.deck, sort_keys=True).encode()).hexdigest()
+
+    def shuffle(self, cards: list[int], seed: int) -> list[int]:
+        """
+        Cards sorted by a hash of the seed and of each physical card
+
+        The n-th copy of a card in `cards` is the n-th copy of the deck. Since the key of
+        a card does not depend on the rest of the deck, two decks shuffled with the same
+        seed keep their common cards in the same order: the deals of two variants only
+        differ by the cards one of them lacks.
+
+        :param cards: The card ids
+        :param seed: The shuffle seed
+
+        :return: The shuffled ids
+        """
+        copies: dict[int:int] = {}
+        keyed = []
+        for kind in cards:
+            copy = copies.get(kind, 0)
+            copies[kind] = copy + 1
+            keyed.append((mix(seed ^ self.keys[kind][copy]), kind))
+        keyed.sort()
+        return [kind for _, kind in keyed]
+
+    def deal(self, seats: int, nb_card: int = 7, rng: random.Random = random) -> "State":
+        cards = self.shuffle(self.cards(), rng.getrandbits(64))
+        hands = [[cards.pop() for _ in range(nb_card)] for _ in range(seats)]
+        # the first card is the first classic one of the pile
+        for i in range(len(cards) - 1, -1, -1):
+            if not self.special[cards[i]] and not self.wild[cards[i]]:
+                top = cards.pop(i)
+                break
+        return State(self, hands, cards, [top], self.color[top], rng=rng)
+
+
+class State:
+    """
+    Game position with the same rules as `Cards`
+
+    The draw pile is popped from the end, `pending` is the total of the draw stack and
+    `current` the seat to play. Moves are `(card id, color)` tuples, or None to pick.
+    """
+
+    def __init__(self, rules: Rules, hands: list[list[int]], draw: list[int], played: list[int], color: int, pending: int = 0, direction: int = 1, current: int = 0, rng: random.Random = None) -> None:
+        self.rules: Rules = rules
+        self.hands: list[list[int]] = hands
+        self.draw: list[int] = draw
+        self.played: list[int] = played
+        self.color: int = color
+        self.pending: int = pending
+        self.direction: int = direction
+        self.current: int = current
+        self.winner: int | None = None
+        self.turns: int = 0
+        self.rng: random.Random | None = rng
+
+    @classmethod
+    def from_cards(cls, cards: "Cards", rules: Rules = None) -> "State":
+        """
+        Snapshot of a running `Cards` game
+
+        :param cards: The game
+        :param rules: The compiled deck of the game, built from `cards.deck` if not given
+
+        :return: The position, seats in `cards.order` order
+        """
+        rules = rules or Rules(cards.deck, cards.regex)
+        top = cards.last_card
+        return cls(
+            rules,
+            [[rules.kind(card) for card in cards.players[player]] for player in cards.order],
+            [rules.kind(card) for card in reversed(cards.cards)],
+            [rules.kind(card) for card in cards.played],
+            rules.colors.index(top.color) if top.color in rules.colors else -1,
+            sum(rules.draw[rules.kind(card)] for card in cards.pile),
+            cards.direction,
+            cards.order.index(cards.current_player),
+        )
+
+    def copy(self) -> "State":
+        state = State(self.rules, [hand[:] for hand in self.hands], self.draw[:], self.played[:], self.color, self.pending, self.direction, self.current, self.rng)
+        state.winner, state.turns = self.winner, self.turns
+        return state
+
+    @property
+    def top(self) -> int:
+        return self.played[-1]
+
+    @property
+    def next(self) -> int:
+        return (self.current + self.direction) % len(self.hands)
+
+    def playable(self, seat: int = None) -> list[int]:
+        legal = self.rules.legal(self.top, self.color, self.pending > 0)
+        return [k for k in dict.fromkeys(self.hands[self.current if seat is None else seat]) if legal[k]]
+
+    def moves(self) -> list[tuple[int, int] | None]:
+        moves = []
+        for k in self.playable():
+            if self.rules.wild[k]:
+                moves.extend((k, c) for c in range(len(self.rules.colors)))
+            else:
+                moves.append((k, self.rules.color[k]))
+        return moves + [None]
+
+    def apply(self, move: tuple[int, int] | None) -> list[int]:
+        """
+        Play a move for the current seat
+
+        :param move: `(card id, color)` to play a card, None to pick
+
+        :return: The drawn cards
+        """
+        if move is None:
+            return self.pick()
+        self.play(*move)
+        return []
+
+    def play(self, kind: int, color: int = None) -> None:
+        rules = self.rules
+        hand = self.hands[self.current]
+        if kind not in hand:
+            raise ValueError("You don't have this card")
+        if not rules.legal(self.top, self.color, self.pending > 0)[kind]:
+            raise ValueError("You can't play this card")
+        hand.remove(kind)
+        self.played.append(kind)
+        self.color = color if rules.wild[kind] and color is not None else rules.color[kind]
+        self.pending += rules.draw[kind]
+        self.turns += 1
+        if not hand:
+            self.winner = self.current
+            return
+        if rules.reverse[kind]:
+            self.direction *= -1
+        if rules.skip[kind]:
+            self.current = self.next
+        self.current = self.next
+
+    def pick(self) -> list[int]:
+        drawn = self.take(self.pending or 1)
+        self.hands[self.current].extend(drawn)
+        self.pending = 0
+        self.turns += 1
+        self.current = self.next
+        return drawn
+
+    def take(self, n: int) -> list[int]:
+        if len(self.draw) < n and self.rng is not None:
+            # put the played cards back under the draw pile
+            self.draw[:0] = self.rules.shuffle(self.played[:-1], self.rng.getrandbits(64))
+            del self.played[:-1]
+        n = min(n, len(self.draw))
+        drawn = self.draw[len(self.draw) - n :]
+        del self.draw[len(self.draw) - n :]
+        return drawn[::-1]
+
+
+if __name__ == "__main__":
+    rules = Rules.from_file()
+    state = rules.deal(2, rng=random.Random(0))
+    while state.winner is None and state.turns < 1000:
+        moves = state.moves()
+        state.apply(moves[0] if moves[0] else None)
+    print(f"winner: {state.winner} in {state.turns} turns")
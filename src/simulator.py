@@ -0,0 +1,117 @@
+import random, time
+
+from src.rules import MASK, Rules, State, mix
+from src.store import GameRecord
+
+Policy = callable
+
+
+def random_policy(state: State, rng: random.Random) -> tuple[int, int] | None:
+    moves = state.moves()
+    return rng.choice(moves[:-1]) if len(moves) > 1 else None
+
+
+def greedy_policy(state: State, rng: random.Random) -> tuple[int, int] | None:
+    """Play a card whenever possible, special cards first, wild cards last, on the color the most held"""
+    rules, hand = state.rules, state.hands[state.current]
+    playable = state.playable()
+    if not playable:
+        return None
+    best = min((rules.wild[k], not rules.special[k]) for k in playable)
+    ties = [k for k in playable if (rules.wild[k], not rules.special[k]) == best]
+    kind = ties[rng.randrange(len(ties))] if len(ties) > 1 else ties[0]
+    if rules.wild[kind]:
+        colors = [rules.color[k] for k in hand if k != kind and not rules.wild[k]]
+        return kind, max(set(colors), key=colors.count) if colors else rng.randrange(len(rules.colors))
+    return kind, rules.color[kind]
+
+
+class Stream(random.Random):
+    """
+    `random.Random` over splitmix64, seeded in constant time
+
+    The Mersenne Twister fills 624 words when seeded, too slow to get a new stream at
+    every decision of a game.
+    """
+
+    def seed(self, a: int = None, version: int = 2) -> None:
+        self.state: int = (a or 0) & MASK
+
+    def getrandbits(self, k: int) -> int:
+        bits = 0
+        for _ in range(0, k, 64):
+            self.state = (self.state + 0x9E3779B97F4A7C15) & MASK
+            bits = bits << 64 | mix(self.state)
+        return bits >> (-k % 64)
+
+    def random(self) -> float:
+        return self.getrandbits(53) * 2.0**-53
+
+
+def game_seeds(seed: int, game: int) -> tuple[int, int]:
+    """
+    Deal and policy seeds of a game, derived from the run seed only
+
+    Two runs with the same seed deal the same shuffles and draw the same policy random
+    numbers, whatever the deck.
+    """
+    rng = random.Random(seed * 1_000_003 + game)
+    return rng.getrandbits(63), rng.getrandbits(63)
+
+
+def play_game(rules: Rules, seats: int = 2, seed: int = 0, game: int = 0, policy: Policy = greedy_policy, nb_card: int = 7, max_turns: int = 1000, variant: str = "default", log: list = None) -> GameRecord:
+    """
+    Play one game without any interaction
+
+    :param rules: The compiled deck
+    :param seats: The number of players
+    :param seed: The run seed
+    :param game: The game number in the run
+    :param policy: Called with the state and a random generator, returns the move
+    :param log: If given, every move is appended as [seat, card name or "" to pick, drawn cards]
+
+    :return: The game record, the winner is None if `max_turns` was reached
+    """
+    deal_seed, policy_seed = game_seeds(seed, game)
+    state = rules.deal(seats, nb_card, random.Random(deal_seed))
+    rng = Stream()
+    stacks, specials = [], {}
+    while state.winner is None and state.turns < max_turns:
+        # a stream per decision: turn t draws the same numbers in every variant
+        rng.seed(mix(policy_seed ^ state.turns))
+        move = policy(state, rng)
+        if move is None:
+            if state.pending:
+                stacks.append(state.pending)
+        elif rules.special[move[0]] or rules.wild[move[0]]:
+            name = rules.kinds[move[0]][1]
+            specials[name] = specials.get(name, 0) + 1
+        seat = state.current
+        drawn = state.apply(move)
+        if log is not None:
+            log.append([seat, rules.name(move[0]) if move else "", len(drawn)])
+    players = [f"seat {i}" for i in range(seats)]
+    return GameRecord(
+        seed=deal_seed,
+        deck_hash=rules.digest,
+        players=players,
+        winner=None if state.winner is None else players[state.winner],
+        turns=state.turns,
+        variant=variant,
+        cards_left=[len(hand) for hand in state.hands],
+        stacks=stacks,
+        specials=specials,
+        game=game,
+    )
+
+
+def simulate(rules: Rules, games: int, seats: int = 2, seed: int = 0, start: int = 0, **kwargs) -> list[GameRecord]:
+    return [play_game(rules, seats, seed, game, **kwargs) for game in range(start, start + games)]
+
+
+if __name__ == "__main__":
+    rules = Rules.from_file()
+    start = time.time()
+    records = simulate(rules, 1000)
+    wins = sum(r.winner == "seat 0" for r in records)
+    print(f"{len(records) / (time.time() - start):.0f} games/s, seat 0 wins {wins / len(records):.3f}, {sum(r.turns for r in records) / len(records):.1f} turns")
@@ -0,0 +1,198 @@
+from collections import OrderedDict
+import random
+
+from src.rules import Rules, State
+
+WIN = 1000
+MATE = WIN // 2
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def to_table(score: int, ply: int) -> int:
+    # forced win / loss scores are stored relative to the node, not to the root
+    return score + ply if score > MATE else score - ply if score < -MATE else score
+
+
+def from_table(score: int, ply: int) -> int:
+    return score - ply if score > MATE else score + ply if score < -MATE else score
+
+
+class TranspositionTable:
+    """Position cache bounded to `capacity` entries, the least recently used ones are evicted"""
+
+    def __init__(self, capacity: int = 1_000_000) -> None:
+        self.capacity: int = capacity
+        self.entries: OrderedDict[int : tuple] = OrderedDict()
+        self.hits: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: int) -> tuple | None:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: int, entry: tuple) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class Zobrist:
+    """Random 64 bits keys xored over hand contents, top card, active color, draw stack, direction and draw pile contents"""
+
+    def __init__(self, rules: Rules, seed: int = 0) -> None:
+        rng = random.Random(seed)
+        bits = lambda: rng.getrandbits(64)
+        size = max(rules.count) + 1
+        self.hand: list[list[list[int]]] = [[[bits() for _ in range(size)] for _ in range(len(rules))] for _ in range(2)]
+        self.top: list[int] = [bits() for _ in range(len(rules))]
+        self.color: list[int] = [bits() for _ in range(len(rules.colors) + 1)]
+        self.pending: dict[int:int] = {}
+        # one key per card id at each position from the top of the draw pile
+        self.draw: list[list[int]] = [[bits() for _ in range(len(rules))] for _ in range(sum(rules.count))]
+        self.current: list[int] = [bits(), bits()]
+        self.direction: int = bits()
+        self.__bits = bits
+
+    def pile(self, draw: list[int]) -> list[int]:
+        """
+        Keys of the draw pile after each number of draws, `draw[:n]` at index n
+
+        Without reshuffle the pile of a position is `draw[:n]` of the root one, so a
+        search computes them once.
+        """
+        return [self.__pile(draw[:n]) for n in range(len(draw) + 1)]
+
+    def __pile(self, draw: list[int]) -> int:
+        key = 0
+        for position, kind in enumerate(reversed(draw)):
+            key ^= self.draw[position][kind]
+        return key
+
+    def __call__(self, state: State, piles: list[int] = None) -> int:
+        key = self.top[state.top] ^ self.color[state.color] ^ self.current[state.current]
+        for seat, hand in enumerate(state.hands):
+            seen: dict[int:int] = {}
+            for kind in hand:
+                seen[kind] = seen.get(kind, -1) + 1
+                key ^= self.hand[seat][kind][seen[kind]]
+        if state.pending not in self.pending:
+            self.pending[state.pending] = self.__bits()
+        key ^= self.pending[state.pending] ^ (piles[len(state.draw)] if piles is not None else self.__pile(state.draw))
+        return key ^ self.direction if state.direction < 0 else key
+
+
+class Solver:
+    """
+    Exact alpha-beta search of two players positions where every card is known
+
+    `state.draw` is the known draw pile, it is not reshuffled. Scores are from the side
+    to move: above `MATE` for a forced win, below `-MATE` for a forced loss, 0 if the
+    search could not conclude within `max_depth` plies. The searches are null window
+    ones, `WIN - score` is a bound on the plies to the end, not an exact count.
+    """
+
+    def __init__(self, rules: Rules, capacity: int = 1_000_000, max_depth: int = 40) -> None:
+        self.rules: Rules = rules
+        self.max_depth: int = max_depth
+        self.table: TranspositionTable = TranspositionTable(capacity)
+        self.zobrist: Zobrist = Zobrist(rules)
+        self.piles: list[int] = []
+        self.nodes: int = 0
+
+    def solve(self, state: State) -> tuple[int, tuple[int, int] | None]:
+        """
+        Solve a position
+
+        :param state: The position, two seats only
+
+        :return: The score for the side to move and the best move
+        """
+        if len(state.hands) != 2:
+            raise ValueError("The solver only handles two players")
+        state = state.copy()
+        state.rng = None
+        self.piles = self.zobrist.pile(state.draw)
+        score, move = 0, None
+        # iterative deepening of two null window searches, "is it won ?" then "is it lost ?",
+        # shallow results are found fast and fill the table with move ordering
+        for depth in range(1, self.max_depth + 1):
+            score, move = self.__search(state, depth, MATE, MATE + 1, 0)
+            if score > MATE:
+                break
+            score, move = self.__search(state, depth, -MATE - 1, -MATE, 0)
+            if score < -MATE:
+                break
+        return (score if abs(score) > MATE else 0), move
+
+    def best_move(self, state: State) -> tuple[int, int] | None:
+        return self.solve(state)[1]
+
+    def __search(self, state: State, depth: int, alpha: int, beta: int, ply: int) -> tuple[int, tuple[int, int] | None]:
+        self.nodes += 1
+        key = self.zobrist(state, self.piles)
+        alpha_start, hint = alpha, None
+        if (entry := self.table.get(key)) is not None:
+            e_depth, e_score, e_flag, hint = entry
+            if e_depth >= depth or abs(e_score) > MATE:
+                score = from_table(e_score, ply)
+                if e_flag == EXACT or (e_flag == LOWER and score >= beta) or (e_flag == UPPER and score <= alpha):
+                    return score, hint
+        if depth == 0:
+            return 0, None
+
+        moves = self.__order(state, hint)
+        best, best_move = -WIN - 1, None
+        for move in moves:
+            child = state.copy()
+            child.apply(move)
+            if child.winner is not None:
+                score = WIN - ply - 1
+            elif child.current == state.current:
+                score = self.__search(child, depth - 1, alpha, beta, ply + 1)[0]
+            else:
+                score = -self.__search(child, depth - 1, -beta, -alpha, ply + 1)[0]
+            if score > best:
+                best, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        flag = UPPER if best <= alpha_start else LOWER if best >= beta else EXACT
+        self.table.put(key, (depth, to_table(best, ply), flag, best_move))
+        return best, best_move
+
+    def __order(self, state: State, hint: tuple[int, int] | None) -> list[tuple[int, int] | None]:
+        rules = self.rules
+        # the known best move first, then the draw cards and the ones emptying the hand the fastest
+        return sorted(state.moves(), key=lambda m: (m != hint, m is None, -rules.draw[m[0]] if m else 0, not rules.special[m[0]] if m else 0))
+
+
+if __name__ == "__main__":
+    rules = Rules.from_file(layers=("cards",))
+    rng = random.Random(27)
+    state = rules.deal(2, 3, rng)
+    solver = Solver(rules)
+    score, move = solver.solve(state)
+    print([[rules.name(k) for k in hand] for hand in state.hands], rules.name(state.top))
+    print(score, move and rules.name(move[0]), f"{solver.nodes} nodes, {len(solver.table)} entries")
+
+    # transposition keys: a solver warmed on sibling positions (same hands, the draw pile
+    # in another order) must give the verdicts of a fresh one
+    warm, verdict, mismatches = Solver(rules, max_depth=30), lambda score: (score > 0) - (score < 0), 0
+    for seed in range(10):
+        base = rules.deal(2, 2, random.Random(seed))
+        base.draw = base.draw[-8:]
+        for _ in range(5):
+            state = base.copy()
+            rng.shuffle(state.draw)
+            mismatches += verdict(warm.solve(state)[0]) != verdict(Solver(rules, max_depth=30).solve(state)[0])
+    assert not mismatches, f"{mismatches} verdicts of the warm solver differ from a fresh one"
+    print("warm and fresh solvers agree on 50 sibling positions")
@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+import hashlib, json, sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    seed INTEGER,
+    deck_hash TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    seats INTEGER NOT NULL,
+    winner TEXT,
+    winner_seat INTEGER,
+    turns INTEGER NOT NULL,
+    max_stack INTEGER NOT NULL,
+    stacks TEXT NOT NULL,
+    run TEXT,
+    game INTEGER
+);
+CREATE TABLE IF NOT EXISTS seats (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    seat INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    cards_left INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seat)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS specials (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (game_id, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_variant ON games (variant, seats);
+CREATE INDEX IF NOT EXISTS games_deck ON games (deck_hash);
+CREATE INDEX IF NOT EXISTS games_winner_seat ON games (variant, winner_seat);
+CREATE INDEX IF NOT EXISTS seats_seat ON seats (seat, player);
+CREATE INDEX IF NOT EXISTS specials_value ON specials (value);
+CREATE UNIQUE INDEX IF NOT EXISTS games_run ON games (run, variant, seats, game) WHERE run IS NOT NULL;
+"""
+
+
+def deck_hash(path: str = "deck.json") -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+@dataclass
+class GameRecord:
+    seed: int | None
+    deck_hash: str
+    players: list[str]
+    winner: str | None
+    turns: int
+    variant: str = "default"
+    cards_left: list[int] = field(default_factory=list)
+    stacks: list[int] = field(default_factory=list)
+    specials: dict[str:int] = field(default_factory=dict)
+    game_id: int | None = None
+    run: str | None = None
+    game: int | None = None
+
+    @property
+    def winner_seat(self) -> int | None:
+        return self.players.index(self.winner) if self.winner in self.players else None
+
+
+class ResultStore:
+    """
+    SQLite store of finished games
+
+    Records are buffered and written `batch` at a time with `executemany` in a single
+    transaction, the database runs in WAL mode so readers never block the writer.
+    A record with a `run` key replaces the game of the same run, variant, seat count and
+    game number, and one with an explicit `game_id` the game of that id, children rows
+    included: replaying games after a crash is harmless. Other records get new ids.
+    """
+
+    def __init__(self, path: str = "results.db", batch: int = 1000) -> None:
+        self.path: str = path
+        self.batch: int = batch
+        self.buffer: list[GameRecord] = []
+        self.db: sqlite3.Connection = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM games").fetchone()[0] + len(self.buffer)
+
+    def add(self, record: GameRecord) -> None:
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch:
+            self.flush()
+
+    def extend(self, records: list[GameRecord]) -> None:
+        for record in records:
+            self.add(record)
+
+    def flush(self) -> int:
+        """
+        Write the buffered records
+
+        :return: The number of written games
+        """
+        if not self.buffer:
+            return 0
+        records = self.buffer
+        # ids are only given to the records once the transaction is committed
+        with self.db:
+            runs = [(r.run, r.variant, len(r.players), r.game) for r in records if r.run is not None]
+            given = [(r.game_id,) for r in records if r.game_id is not None]
+            for table, column in (("seats", "game_id"), ("specials", "game_id"), ("games", "id")):
+                self.db.executemany(f"DELETE FROM {table} WHERE {column} IN (SELECT id FROM games WHERE run = ? AND variant = ? AND seats = ? AND game = ?)", runs)
+                self.db.executemany(f"DELETE FROM {table} WHERE {column} = ?", given)
+            # new ids start past the stored ones and the explicit ones of the batch
+            start = max([self.db.execute("SELECT COALESCE(MAX(id), 0) FROM games").fetchone()[0], *(i for (i,) in given)]) + 1
+            ids = []
+            for record in records:
+                ids.append(start if record.game_id is None else record.game_id)
+                start += record.game_id is None
+            self.db.executemany(
+                "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (i, r.seed, r.deck_hash, r.variant, len(r.players), r.winner, r.winner_seat, r.turns, max(r.stacks, default=0), json.dumps(r.stacks), r.run, r.game)
+                    for i, r in zip(ids, records)
+                ],
+            )
+            self.db.executemany(
+                "INSERT INTO seats VALUES (?, ?, ?, ?)",
+                [(i, seat, player, left) for i, r in zip(ids, records) for seat, (player, left) in enumerate(zip(r.players, r.cards_left or [0] * len(r.players)))],
+            )
+            self.db.executemany("INSERT INTO specials VALUES (?, ?, ?)", [(i, value, count) for i, r in zip(ids, records) for value, count in r.specials.items()])
+        for i, record in zip(ids, records):
+            record.game_id = i
+        self.buffer = []
+        return len(records)
+
+    def query(self, sql: str, params: tuple | dict = ()) -> list[tuple]:
+        self.flush()
+        return self.db.execute(sql, params).fetchall()
+
+    def win_rate_by_seat(self, variant: str = "default") -> dict[int:float]:
+        rows = self.query("SELECT winner_seat, COUNT(*) FROM games WHERE variant = ? AND winner_seat IS NOT NULL GROUP BY winner_seat", (variant,))
+        total = sum(count for _, count in rows)
+        return {seat: count / total for seat, count in rows}
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+
+
+if __name__ == "__main__":
+    with ResultStore(":memory:") as store:
+        store.add(GameRecord(42, deck_hash(), ["test 1", "test 2"], "test 2", 31, cards_left=[3, 0], stacks=[2, 4], specials={"skip": 2, "draw2": 3}))
+        print(store.win_rate_by_seat())
+
+    # new ids skip the explicit ones of the batch, a failed flush keeps the batch
+    with ResultStore(":memory:") as store:
+        store.extend([GameRecord(1, deck_hash(), ["a", "b"], "a", 10), GameRecord(2, deck_hash(), ["a", "b"], "b", 12, game_id=1)])
+        store.flush()
+        assert [i for (i,) in store.query("SELECT id FROM games ORDER BY id")] == [1, 2]
+        store.extend([GameRecord(3, deck_hash(), ["a", "b"], "a", 8, game_id=7), GameRecord(4, deck_hash(), ["a", "b"], "b", 9, game_id=7)])
+        try:
+            store.flush()
+        except sqlite3.IntegrityError:
+            assert len(store.buffer) == 2 and all(r.game_id == 7 for r in store.buffer), "the failed batch must stay buffered"
+        else:
+            raise AssertionError("two games with id 7 were written")
+        store.buffer.pop()
+    print("store ok")
@@ -0,0 +1,114 @@
+import hashlib, json, os, time
+
+from src.rules import Rules
+from src.simulator import play_game
+from src.store import GameRecord, ResultStore
+
+
+class Sweep:
+    """
+    Simulation over every (variant, seat count) cell, resumable
+
+    Game seeds only depend on the run seed and the game number, so the random state of
+    a cell is just its next game number. The checkpoint file keeps, per cell, that
+    number and the aggregates of the games before it; it is written atomically every
+    `every` games, after the result store is flushed. A restarted sweep reloads it and
+    carries on with the next game: nothing is played twice nor counted twice.
+    """
+
+    def __init__(self, variants: dict[str : tuple[str]], seats: list[int], games: int, seed: int = 0, checkpoint: str = "sweep.json", every: int = 1000, store: ResultStore = None, **kwargs) -> None:
+        """
+        :param variants: Name of each variant and its deck layers
+        :param seats: The seat counts
+        :param games: The number of games of each cell
+        :param store: Where to write the game records, if any
+        :param kwargs: Given to `play_game`
+        """
+        self.rules: dict[str:Rules] = {name: Rules.from_file(layers=layers) for name, layers in variants.items()}
+        self.cells: list[tuple[str, int]] = [(name, n) for name in variants for n in seats]
+        self.games: int = games
+        self.seed: int = seed
+        self.checkpoint: str = checkpoint
+        self.every: int = every
+        self.store: ResultStore | None = store
+        self.kwargs: dict = kwargs
+        self.config: dict = {"variants": {name: rules.digest for name, rules in self.rules.items()}, "seats": list(seats), "games": games, "seed": seed, "options": {key: getattr(value, "__name__", value) for key, value in kwargs.items()}}
+        # the games of this sweep in the result store, whatever else it holds
+        self.run_key: str = hashlib.sha1(json.dumps(self.config, sort_keys=True).encode()).hexdigest()
+        self.progress: dict[str:dict] = {self.key(cell): {"next": 0, "wins": [0] * cell[1], "unfinished": 0, "turns": 0, "turns2": 0, "stacks": 0, "specials": {}} for cell in self.cells}
+        self.load()
+
+    @staticmethod
+    def key(cell: tuple[str, int]) -> str:
+        return f"{cell[0]}/{cell[1]}"
+
+    @property
+    def done(self) -> bool:
+        return all(cell["next"] >= self.games for cell in self.progress.values())
+
+    def load(self) -> bool:
+        if not os.path.exists(self.checkpoint):
+            return False
+        with open(self.checkpoint) as file:
+            checkpoint = json.load(file)
+        if checkpoint["config"] != self.config:
+            raise ValueError(f"{self.checkpoint} belongs to another sweep")
+        self.progress = checkpoint["progress"]
+        return True
+
+    def save(self) -> None:
+        if self.store is not None:
+            self.store.flush()
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"config": self.config, "progress": self.progress, "time": time.time()}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.checkpoint)
+
+    def add(self, progress: dict, record: GameRecord) -> None:
+        progress["next"] += 1
+        if record.winner_seat is None:
+            progress["unfinished"] += 1
+        else:
+            progress["wins"][record.winner_seat] += 1
+        progress["turns"] += record.turns
+        progress["turns2"] += record.turns**2
+        progress["stacks"] += sum(record.stacks)
+        for value, count in record.specials.items():
+            progress["specials"][value] = progress["specials"].get(value, 0) + count
+
+    def run(self) -> dict[str:dict]:
+        """
+        Play the missing games of every cell
+
+        :return: The aggregates of every cell, by "variant/seats"
+        """
+        for cell in self.cells:
+            name, seats = cell
+            progress = self.progress[self.key(cell)]
+            while progress["next"] < self.games:
+                game = progress["next"]
+                record = play_game(self.rules[name], seats, self.seed, game, variant=name, **self.kwargs)
+                record.run = self.run_key
+                if self.store is not None:
+                    self.store.add(record)
+                self.add(progress, record)
+                if progress["next"] % self.every == 0:
+                    self.save()
+            self.save()
+        return self.progress
+
+    def summary(self) -> dict[str:dict]:
+        summary = {}
+        for key, progress in self.progress.items():
+            n = progress["next"] or 1
+            summary[key] = {"games": progress["next"], "win_rate": [round(w / n, 4) for w in progress["wins"]], "turns": round(progress["turns"] / n, 2), "unfinished": progress["unfinished"]}
+        return summary
+
+
+if __name__ == "__main__":
+    sweep = Sweep({"base": ("cards",), "addons": ("cards", "addons")}, [2, 4], 200, checkpoint="sweep.json", every=50, max_turns=300)
+    sweep.run()
+    print(json.dumps(sweep.summary(), indent=4))
+    os.remove("sweep.json")
@@ -0,0 +1,192 @@
+import time
+
+Cards = any
+
+
+class Timer:
+    __slots__ = ("expires", "callback", "args", "slot")
+
+    def __init__(self, expires: int, callback: callable, args: tuple) -> None:
+        self.expires: int = expires
+        self.callback: callable = callback
+        self.args: tuple = args
+        self.slot: dict["Timer":None] = None
+
+    def __repr__(self) -> str:
+        return f"Timer at tick {self.expires}"
+
+    @property
+    def active(self) -> bool:
+        return self.slot is not None
+
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel
+
+    Every level holds `slots` buckets, a bucket of level n covering `slots ** n` ticks.
+    Arming and cancelling a timer is a dict insert / delete, expired timers are fired
+    by `advance`, so any number of deadlines is tracked without a thread or a sleep each.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 64, levels: int = 4, clock: callable = time.monotonic) -> None:
+        self.tick: float = tick
+        self.slots: int = slots
+        self.levels: int = levels
+        self.clock: callable = clock
+        self.start: float = clock()
+        self.ticks: int = 0
+        self.wheels: list[list[dict[Timer:None]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.__count: int = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def arm(self, delay: float, callback: callable, *args) -> Timer:
+        """
+        Arm a timer
+
+        :param delay: Seconds before the callback is fired
+        :param callback: The function to call on expiry
+        :param args: The arguments given to the callback
+
+        :return: The timer, to give to `cancel`
+        """
+        timer = Timer(self.ticks + max(1, -int(-delay // self.tick)), callback, args)
+        self.__place(timer)
+        self.__count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        """
+        Cancel a timer
+
+        :param timer: The timer returned by `arm`
+
+        :return: True if the timer was still pending
+        """
+        if timer is None or timer.slot is None:
+            return False
+        del timer.slot[timer]
+        timer.slot = None
+        self.__count -= 1
+        return True
+
+    def advance(self, now: float = None) -> int:
+        """
+        Move the wheel up to `now` and fire every expired timer
+
+        :param now: The current time, default to the wheel clock
+
+        :return: The number of fired timers
+        """
+        target = int(((self.clock() if now is None else now) - self.start) // self.tick)
+        fired = 0
+        while self.ticks < target:
+            if not self.__count:
+                self.ticks = target
+                break
+            self.ticks += 1
+            self.__cascade()
+            bucket = self.wheels[0][self.ticks % self.slots]
+            while bucket:
+                timer = next(iter(bucket))
+                del bucket[timer]
+                timer.slot = None
+                self.__count -= 1
+                fired += 1
+                timer.callback(*timer.args)
+        return fired
+
+    @property
+    def next_deadline(self) -> float | None:
+        """Time of the next expiry, None if nothing is armed"""
+        if not self.__count:
+            return None
+        expires = []
+        for level, wheel in enumerate(self.wheels):
+            span = self.slots**level
+            for i in range(self.slots + 1):
+                if bucket := wheel[(self.ticks // span + i) % self.slots]:
+                    expires.append(min(t.expires for t in bucket))
+                    break
+        return self.start + min(expires) * self.tick
+
+    def __place(self, timer: Timer) -> None:
+        delta = timer.expires - self.ticks
+        for level in range(self.levels):
+            span = self.slots**level
+            if delta < span * self.slots or level == self.levels - 1:
+                # too far away for the wheel, park it on the last slot until it is cascaded again
+                expires = min(timer.expires, self.ticks + span * (self.slots - 1))
+                timer.slot = self.wheels[level][(expires // span) % self.slots]
+                timer.slot[timer] = None
+                return
+
+    def __cascade(self) -> None:
+        span = 1
+        for level in range(1, self.levels):
+            if (self.ticks // span) % self.slots:
+                return
+            span *= self.slots
+            bucket = self.wheels[level][(self.ticks // span) % self.slots]
+            timers = list(bucket)
+            bucket.clear()
+            for timer in timers:
+                self.__place(timer)
+
+
+class TurnClock:
+    """
+    Turn time limit for many tables driven by one `TimerWheel`
+
+    On expiry `table.timeout()` is called, which auto-draws and passes the turn.
+    """
+
+    def __init__(self, limit: float = 30, wheel: TimerWheel = None) -> None:
+        self.limit: float = limit
+        # an idle wheel is empty, hence falsy: test for None
+        self.wheel: TimerWheel = wheel if wheel is not None else TimerWheel()
+        self.timers: dict[Cards:Timer] = {}
+
+    def start(self, table: "Cards", limit: float = None) -> Timer:
+        self.stop(table)
+        self.timers[table] = self.wheel.arm(self.limit if limit is None else limit, self.__expire, table)
+        return self.timers[table]
+
+    def stop(self, table: "Cards") -> bool:
+        return self.wheel.cancel(self.timers.pop(table, None))
+
+    def advance(self, now: float = None) -> int:
+        return self.wheel.advance(now)
+
+    def __expire(self, table: "Cards") -> None:
+        del self.timers[table]
+        table.timeout()
+        self.start(table)
+
+
+if __name__ == "__main__":
+    wheel = TimerWheel(tick=0.01)
+    for i in range(5):
+        wheel.arm(i * 0.05, print, f"timer {i}")
+    while len(wheel):
+        wheel.advance()
+        time.sleep(0.01)
+
+    # a clock on a shared wheel driven by hand: the table times out on the wheel given
+    class Table:
+        timeouts = 0
+
+        def timeout(self) -> None:
+            self.timeouts += 1
+
+    shared, table = TimerWheel(tick=0.5, clock=lambda: 0.0), Table()
+    clock = TurnClock(limit=10, wheel=shared)
+    assert clock.wheel is shared
+    clock.start(table)
+    clock.advance(9.5)
+    assert table.timeouts == 0
+    clock.advance(10.5)
+    assert table.timeouts == 1 and len(shared) == 1, "the turn clock must fire on the wheel it was given"
+    print("turn clock ok")
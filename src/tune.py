@@ -0,0 +1,112 @@
+import random
+
+from src.config import DeckConfig
+from src.rules import Rules
+from src.simulator import play_game
+from src.store import GameRecord
+
+
+def game_length(target: float) -> callable:
+    """Distance of the mean number of turns to `target`"""
+    return lambda records: abs(sum(r.turns for r in records) / len(records) - target)
+
+
+def first_player_advantage(records: list[GameRecord]) -> float:
+    """Distance of the first seat win rate to a fair share"""
+    return abs(sum(r.winner_seat == 0 for r in records) / len(records) - 1 / len(records[0].players))
+
+
+class AddonSearch:
+    """
+    Successive halving over the deck addon configurations
+
+    A candidate picks, on top of the `base` layers, any subset of the values of the
+    `addon` layer and a number of copies for the draw cards it keeps. `candidates`
+    random ones play `games` games each, the best 1 / `eta` go on with `eta` times
+    more games, until one is left. Every candidate plays the same seeds, games already
+    played are kept from round to round.
+    """
+
+    def __init__(self, objective: callable, base: tuple[str] = ("cards",), addon: str = "addons", max_copies: int = 3, seats: int = 2, seed: int = 0, path: str = "deck.json", **kwargs) -> None:
+        """
+        :param objective: Called with the game records of a candidate, lower is better
+        :param kwargs: Given to `play_game`
+        """
+        config = DeckConfig.open(path)
+        self.objective: callable = objective
+        self.base: dict[str : list[str]] = config.deck(base)
+        self.addon: dict[str : list[str]] = config.layer(addon)
+        self.regex: list[str] = config.regex
+        self.max_copies: int = max_copies
+        self.seats: int = seats
+        self.seed: int = seed
+        self.kwargs: dict = kwargs
+        self.rng: random.Random = random.Random(seed)
+        self.draws: list[str] = [v for key in ("sp_counter", "wild") for v in self.addon.get(key, []) if Rules.action(v, self.regex)]
+        self.records: dict[tuple : list[GameRecord]] = {}
+        self.rules: dict[tuple:Rules] = {}
+        self.played: int = 0
+
+    def sample(self) -> tuple:
+        """A random candidate: the kept values of each addon key, then the copies of each draw card"""
+        while True:
+            chosen = tuple((key, tuple(v for v in values if self.rng.random() < 0.5)) for key, values in self.addon.items())
+            kept = {v for _, values in chosen for v in values}
+            copies = tuple((v, self.rng.randint(1, self.max_copies)) for v in self.draws if v in kept)
+            try:
+                self.compile((chosen, copies))
+            except ValueError:
+                continue
+            return chosen, copies
+
+    def deck(self, candidate: tuple) -> dict[str : list[str]]:
+        chosen, copies = candidate
+        copies = dict(copies)
+        deck = {key: list(values) for key, values in self.base.items()}
+        for key, values in chosen:
+            for value in values:
+                deck[key] = deck.get(key, []) + [value] * copies.get(value, 1)
+        DeckConfig.validate(deck)
+        return deck
+
+    def compile(self, candidate: tuple) -> Rules:
+        if candidate not in self.rules:
+            self.rules[candidate] = Rules(self.deck(candidate), self.regex)
+        return self.rules[candidate]
+
+    def score(self, candidate: tuple, games: int) -> float:
+        records = self.records.setdefault(candidate, [])
+        rules = self.compile(candidate)
+        for game in range(len(records), games):
+            records.append(play_game(rules, self.seats, self.seed, game, **self.kwargs))
+            self.played += 1
+        return self.objective(records[:games])
+
+    def run(self, candidates: int = 64, games: int = 20, eta: int = 2) -> tuple[tuple, float]:
+        """
+        Search the best candidate
+
+        :param candidates: The number of random candidates of the first round
+        :param games: The games of each candidate in the first round
+        :param eta: The elimination rate
+
+        :return: The best candidate and its score
+        """
+        pool = list(dict.fromkeys(self.sample() for _ in range(candidates)))
+        while True:
+            scores = {candidate: self.score(candidate, games) for candidate in pool}
+            pool = sorted(pool, key=scores.get)
+            if len(pool) == 1:
+                return pool[0], scores[pool[0]]
+            pool = pool[: max(1, len(pool) // eta)]
+            games *= eta
+
+    def describe(self, candidate: tuple) -> dict[str : list[str]]:
+        chosen, copies = candidate
+        return {**{key: list(values) for key, values in chosen if values}, "copies": dict(copies)}
+
+
+if __name__ == "__main__":
+    search = AddonSearch(game_length(60), max_turns=400)
+    best, score = search.run(candidates=16, games=10)
+    print(search.describe(best), f"off by {score:.2f} turns, {search.played} games played")
@@ -1,10 +1,3 @@
-def merge(a, b, c):
-    c = {}
-    for k in set(list(a.keys()) + list(b.keys()) + list(c.keys())):
-        c[k] = a.get(k, []) + b.get(k, []) + c.get(k, [])
-    return c
-
-
 import keyboard, time, os
 
 
@@ -53,6 +46,109 @@ def select_data(data: list[dict] | list[object], dkey: str = "name") -> dict:
         print(f"\033[{rows + 2}A", end="")
 
 
+class Picker:
+    """
+    Searchable list which only draws the visible lines
+
+    Typing filters the entries: "r7" keeps the ones whose words start with r then 7
+    (red 7), "red" the ones starting with red. Every entry prefix up to `depth`
+    characters is indexed once, longer queries narrow the previous result.
+    """
+
+    def __init__(self, data: list[dict] | list[object], dkey: str = "name", height: int = None, depth: int = 4) -> None:
+        if not isinstance(data[0], dict):
+            data = [{dkey: x} for x in data]
+        self.data: list[dict] = data
+        self.dkey: str = dkey
+        self.height: int = height or max(3, os.get_terminal_size().lines - 4)
+        self.depth: int = depth
+        names = [str(dt[dkey]) for dt in data]
+        self.width: int = max(map(len, names)) + len(str(len(data))) + 2
+        lstr = len(str(len(data)))
+        self.cells: list[str] = [f"{str(i + 1).rjust(lstr)}. {name}".ljust(self.width) for i, name in enumerate(names)]
+        self.index: dict[str : list[int]] = {}
+        self.keys: list[tuple[str, str]] = []
+        for i, name in enumerate(names):
+            words = name.lower().split()
+            full, short = "".join(words), "".join(w[0] for w in words[:-1]) + (words[-1] if words else "")
+            self.keys.append((full, short))
+            for key in {full[:n] for n in range(1, depth + 1)} | {short[:n] for n in range(1, depth + 1)}:
+                self.index.setdefault(key, []).append(i)
+        self.query: str = ""
+        self.results: list[list[int]] = [list(range(len(data)))]
+        self.selected: int = 0
+        self.offset: int = 0
+
+    @property
+    def matches(self) -> list[int]:
+        return self.results[-1]
+
+    def type(self, char: str) -> None:
+        self.query += char.lower()
+        query = self.query.replace(" ", "")
+        if len(query) <= self.depth:
+            matches = self.index.get(query, []) if query else list(range(len(self.data)))
+        else:
+            matches = [i for i in self.matches if self.keys[i][0].startswith(query) or self.keys[i][1].startswith(query)]
+        self.results.append(matches)
+        self.selected = self.offset = 0
+
+    def erase(self) -> None:
+        if self.query:
+            self.query = self.query[:-1]
+            self.results.pop()
+            self.selected = self.offset = 0
+
+    def move(self, delta: int) -> None:
+        if not self.matches:
+            return
+        self.selected = (self.selected + delta) % len(self.matches)
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + self.height:
+            self.offset = self.selected - self.height + 1
+
+    def lines(self) -> list[str]:
+        lines = [f"┌{f' {self.query} ({len(self.matches)}/{len(self.data)}) '.ljust(self.width, '─')}┐"]
+        for row in range(self.offset, self.offset + self.height):
+            if row < len(self.matches):
+                cell = self.cells[self.matches[row]]
+                lines.append(f"│\033[7m{cell}\033[0m│" if row == self.selected else f"│{cell}│")
+            else:
+                lines.append(f"│{' ' * self.width}│")
+        lines.append(f"└{'─' * self.width}┘")
+        return lines
+
+    def pick(self) -> dict:
+        while True:
+            lines = self.lines()
+            print("\n".join(lines))
+            while (event := keyboard.read_event()).event_type != keyboard.KEY_DOWN:
+                pass
+            key = event.name
+            if key in ["up", "haut"]:
+                self.move(-1)
+            elif key in ["down", "bas"]:
+                self.move(1)
+            elif key in ["page up"]:
+                self.move(-self.height)
+            elif key in ["page down"]:
+                self.move(self.height)
+            elif key == "backspace":
+                self.erase()
+            elif key == "enter" and self.matches:
+                return self.data[self.matches[self.selected]]
+            elif key == "space":
+                self.type(" ")
+            elif len(key) == 1:
+                self.type(key)
+            print(f"\033[{len(lines)}A", end="")
+
+
+def search_data(data: list[dict] | list[object], dkey: str = "name") -> dict:
+    return Picker(data, dkey).pick()
+
+
 if __name__ == "__main__":
     data = [
         {"name": "a"},